@@ -1,13 +1,11 @@
 import os
 import uuid
-import tempfile
 import pandas as pd
 from openpyxl import Workbook
 from openpyxl.utils.dataframe import dataframe_to_rows
 from openpyxl.styles import Font
 from openpyxl.worksheet.table import Table, TableStyleInfo
 from openpyxl.formula.translate import Translator
-from transformers import AutoTokenizer, AutoModelForCausalLM
 import torch
 import xlwings as xw
 from fastapi import FastAPI, UploadFile, File, Request
@@ -17,6 +15,13 @@ from fastapi.middleware.cors import CORSMiddleware
 import tkinter as tk
 from tkinter import filedialog, simpledialog, messagebox
 from fastapi import APIRouter
+from model_registry import register_pipeline
+from inference import run_inference, generate_text
+from prefix_cache import register_prefix
+from constrained import is_valid_formula
+from semantic_cache import semantic_cached
+from artifact_store import artifacts
+from tracing import traced
 
 router = APIRouter()
 
@@ -27,7 +32,7 @@ def example_route():
 
 # ⚙️ FastAPI App
 app = FastAPI()
-TEMP_STORAGE = {}
+UPLOAD_TTL_SECONDS = int(os.getenv("EXCEL_UPLOAD_TTL_SECONDS", "3600"))
 
 app.add_middleware(
     CORSMiddleware,
@@ -37,36 +42,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 🤖 Load model (phi-1_5)
-print("🔄 Loading AI model (phi-1_5)...")
-tokenizer = AutoTokenizer.from_pretrained("microsoft/phi-1_5")
-model = AutoModelForCausalLM.from_pretrained("microsoft/phi-1_5")
+# 🤖 Declare model (phi-1_5) — loaded on first use
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-model.to(device)
-print("✅ Model Ready")
+register_pipeline("excel.phi", "text-generation", "microsoft/phi-1_5", device=str(device))
+register_prefix("excel.phi", "Generate only Excel formula for:", "User command:")
 
 # 🎯 AI summary from Hinglish
+@traced()
 def generate_task_summary(user_cmd: str) -> str:
     prompt = f"User command: {user_cmd}\nWhat should be done (explain in 1 line):"
-    inputs = tokenizer(prompt, return_tensors="pt").to(device)
-    output = model.generate(**inputs, max_length=80)
-    return tokenizer.decode(output[0], skip_special_tokens=True).split(":")[-1].strip()
+    output = generate_text("excel.phi", prompt, max_length=80)
+    return output.split(":")[-1].strip()
 
 # 🧮 Excel formula generator
+@traced()
+@semantic_cached("excel-formula")
 def generate_formula_with_phi(instruction: str) -> str:
+    # Decoding is constrained to Excel formula syntax and stops once the formula is complete;
+    # "" means the model produced no usable formula within the token budget.
     prompt = f"Generate only Excel formula for: {instruction}\nFormula:"
-    inputs = tokenizer(prompt, return_tensors="pt").to(device)
-    output = model.generate(**inputs, max_length=100)
-    return tokenizer.decode(output[0], skip_special_tokens=True).split("Formula:")[-1].strip()
+    output = generate_text("excel.phi", prompt, max_length=100, constraint="excel-formula")
+    formula = output.split("Formula:")[-1].strip()
+    return formula if is_valid_formula(formula) else ""
 
 # 📄 Apply formula to worksheet
+@traced()
 def apply_formula_all_rows(ws, formula: str, start_row: int, target_col: int, max_row: int):
+    # Translator only shifts references when the formula starts with "=", and returns it with the "=".
+    formula = "=" + formula.strip().lstrip("=")
     ws.cell(row=1, column=target_col, value="Result")
     for i in range(start_row, max_row + 1):
         translated = Translator(formula, origin="B2").translate_formula(f"{chr(65 + target_col - 2)}{i}")
-        ws.cell(row=i, column=target_col, value=f"={translated}")
+        ws.cell(row=i, column=target_col, value=translated)
 
 # 🧠 AI logic to apply
+@traced()
 def apply_excel_logic_with_formula(df: pd.DataFrame, instruction: str, sheet_name="Processed", overwrite=False, original_path=None) -> Workbook:
     wb = Workbook()
     ws = wb.active
@@ -85,7 +95,7 @@ def apply_excel_logic_with_formula(df: pd.DataFrame, instruction: str, sheet_nam
     ws.add_table(table)
 
     formula = generate_formula_with_phi(instruction)
-    if "=" in formula or any(c in formula for c in "+-*/SUMsum"):
+    if formula:
         apply_formula_all_rows(ws, formula, start_row=2, target_col=total_cols + 1, max_row=total_rows + 1)
 
     if "pivot" in instruction.lower():
@@ -186,10 +196,7 @@ async def main_page():
 async def upload_excel(file: UploadFile = File(...)):
     contents = await file.read()
     temp_id = str(uuid.uuid4())
-    temp_path = os.path.join(tempfile.gettempdir(), f"{temp_id}.xlsx")
-    with open(temp_path, "wb") as f:
-        f.write(contents)
-    TEMP_STORAGE[temp_id] = temp_path
+    artifacts.save(".xlsx", lambda p: p.write_bytes(contents), name=temp_id, ttl=UPLOAD_TTL_SECONDS)
     return {"message": "✅ File uploaded", "session_id": temp_id}
 
 class Options(BaseModel):
@@ -201,7 +208,7 @@ class Options(BaseModel):
 @app.post("/options/")
 async def process_with_options(options: Options):
     if options.session_id:
-        file_path = TEMP_STORAGE.get(options.session_id, "")
+        file_path = str(artifacts.get(f"{options.session_id}.xlsx") or "")
     else:
         file_path = get_open_excel_path()
 
@@ -211,12 +218,11 @@ async def process_with_options(options: Options):
     df = pd.read_excel(file_path)
 
     if options.overwrite:
-        apply_excel_logic_with_formula(df, options.user_instruction, options.sheet_name, overwrite=True, original_path=file_path)
+        await run_inference(apply_excel_logic_with_formula, df, options.user_instruction, options.sheet_name, overwrite=True, original_path=file_path)
         return JSONResponse(content={"message": "✅ File overwritten successfully", "path": file_path})
 
-    wb = apply_excel_logic_with_formula(df, options.user_instruction, options.sheet_name)
-    output_path = file_path.replace(".xlsx", "_output.xlsx")
-    wb.save(output_path)
+    wb = await run_inference(apply_excel_logic_with_formula, df, options.user_instruction, options.sheet_name)
+    output_path = artifacts.save(".xlsx", wb.save, prefix="excel_output_")
     return FileResponse(output_path, media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", filename="smart_processed.xlsx")
 
 # 🖥️ CLI Mode
@@ -0,0 +1,252 @@
+import asyncio
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from metrics import Counter, Histogram, GaugeFunc
+import deadlines
+
+# 🚦 Admission control and load shedding
+# Model-heavy routes get a concurrency limit and a queue-time budget. A request that can't start
+# within its budget (or finds the queue full) is rejected at once with 503 + Retry-After instead
+# of piling up behind slow generations. While a request is queued or running, its receive channel
+# is pumped in the background (messages are buffered and replayed to the app), so a client
+# disconnect is noticed immediately: a queued request is dropped and any inference it has
+# waiting in the executor or a batcher is cancelled. Every request also gets its route's
+# deadline here (deadlines.py), counted from arrival so queueing eats into it.
+#
+# ADMISSION_ROUTES overrides the defaults: "/blog/generate=2:10000:16,/seo/seo=4:5000"
+# (path=concurrency:queue budget ms[:max queued]).
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+
+DEFAULT_ROUTES = {
+    "/blog/generate": (2, 10000),
+    "/blog/generate/stream": (2, 10000),
+    "/ppt/generate": (2, 5000),
+    "/ppt/generate/stream": (2, 5000),
+    "/ppt/upload": (2, 5000),
+    "/ppt/interactive": (2, 5000),
+    "/word/generate-docx-ui": (4, 5000),
+    "/word/process-open-word": (2, 5000),
+    "/seo/seo": (4, 5000),
+    "/excel/options": (4, 3000),
+    "/tts/tts/generate": (2, 5000),
+    "/code/generate": (1, 2000),
+    "/code/generate-ui": (1, 2000),
+}
+
+ADMISSION_REJECTED = Counter("admission_rejected_total", "Requests shed by admission control, by route and reason")
+ADMISSION_WAIT_SECONDS = Histogram("admission_wait_seconds", "Time admitted requests waited for a slot, by route")
+
+
+def _parse_routes(value: str) -> dict:
+    routes = {}
+    for item in value.split(","):
+        path, _, spec = item.strip().partition("=")
+        if not spec:
+            continue
+        parts = [int(p) for p in spec.split(":")]
+        routes[path.rstrip("/")] = tuple(parts)
+    return routes
+
+
+# === Request cancellation ===
+class CancelToken:
+    # Collects the request's pending inference futures; cancel() drops the ones not yet started.
+    def __init__(self):
+        self.cancelled = False
+        self._futures = []
+        self._lock = threading.Lock()
+
+    def track(self, future):
+        with self._lock:
+            if not self.cancelled:
+                self._futures = [f for f in self._futures if not f.done()]
+                self._futures.append(future)
+                return
+        future.cancel()
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            futures, self._futures = self._futures, []
+        for future in futures:
+            future.cancel()
+
+
+_request_token = contextvars.ContextVar("admission_token", default=None)
+
+
+def track(future):
+    token = _request_token.get()
+    if token is not None:
+        token.track(future)
+    return future
+
+
+# === Limiters ===
+class RouteLimiter:
+    def __init__(self, route: str, limit: int, budget_ms: int, max_queue: int = ADMISSION_MAX_QUEUE):
+        self.route = route
+        self.limit = limit
+        self.budget = budget_ms / 1000
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiters = deque()
+        self.service_seconds = 1.0  # EWMA of admitted request duration, for Retry-After
+        self.counters = {"admitted": 0, "queue_full": 0, "budget": 0, "disconnected": 0}
+
+    def try_acquire(self) -> bool:
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            return True
+        return False
+
+    def enqueue(self) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append(future)
+        return future
+
+    def release(self):
+        # Hand the slot straight to the next live waiter.
+        while self.waiters:
+            future = self.waiters.popleft()
+            if not future.done():
+                future.set_result(True)
+                return
+        self.active -= 1
+
+    def abandon(self, future: asyncio.Future):
+        if future.done() and not future.cancelled():
+            self.release()  # the slot arrived just as we gave up
+            return
+        future.cancel()
+        try:
+            self.waiters.remove(future)
+        except ValueError:
+            pass
+
+    def observe(self, seconds: float):
+        self.service_seconds = 0.8 * self.service_seconds + 0.2 * seconds
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.service_seconds * (len(self.waiters) + 1) / self.limit))
+
+    def stats(self) -> dict:
+        return {**self.counters, "limit": self.limit, "budget_ms": int(self.budget * 1000), "active": self.active,
+                "queued": len(self.waiters), "avg_service_seconds": round(self.service_seconds, 3)}
+
+
+class _ReceiveChannel:
+    # Owns the ASGI receive stream for the whole request; the app reads the buffered messages.
+    def __init__(self, receive, token: CancelToken):
+        self._receive = receive
+        self._token = token
+        self._messages = asyncio.Queue()
+        self.disconnected = asyncio.Event()
+        self._task = asyncio.ensure_future(self._pump())
+
+    async def _pump(self):
+        while True:
+            message = await self._receive()
+            self._messages.put_nowait(message)
+            if message["type"] == "http.disconnect":
+                self.disconnected.set()
+                self._token.cancel()
+                return
+
+    async def receive(self):
+        return await self._messages.get()
+
+    def close(self):
+        self._task.cancel()
+
+
+_limiters = {}
+
+
+def limiters() -> dict:
+    if not _limiters:
+        routes = {**DEFAULT_ROUTES, **_parse_routes(os.getenv("ADMISSION_ROUTES", ""))}
+        for route, spec in routes.items():
+            _limiters[route] = RouteLimiter(route, *spec)
+    return _limiters
+
+
+class AdmissionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        with deadlines.deadline(deadlines.for_request(scope["path"], scope.get("headers", []))):
+            limiter = limiters().get(scope["path"].rstrip("/")) if ADMISSION_ENABLED else None
+            if limiter is None:
+                return await self.app(scope, receive, send)
+            await self._admitted(limiter, scope, receive, send)
+
+    async def _admitted(self, limiter: RouteLimiter, scope, receive, send):
+        token = CancelToken()
+        ctx = _request_token.set(token)
+        channel = _ReceiveChannel(receive, token)
+        try:
+            queued_at = time.perf_counter()
+            reason = await self._admit(limiter, channel)
+            if reason:
+                limiter.counters[reason] += 1
+                ADMISSION_REJECTED.inc(route=limiter.route, reason=reason)
+                await self._reject(send, limiter, reason)
+                return
+            limiter.counters["admitted"] += 1
+            started = time.perf_counter()
+            ADMISSION_WAIT_SECONDS.observe(started - queued_at, route=limiter.route)
+            try:
+                await self.app(scope, channel.receive, send)
+            finally:
+                limiter.release()
+                limiter.observe(time.perf_counter() - started)
+        finally:
+            channel.close()
+            _request_token.reset(ctx)
+
+    async def _admit(self, limiter: RouteLimiter, channel: _ReceiveChannel):
+        if limiter.try_acquire():
+            return None
+        if len(limiter.waiters) >= limiter.max_queue:
+            return "queue_full"
+        slot = limiter.enqueue()
+        disconnect = asyncio.ensure_future(channel.disconnected.wait())
+        try:
+            done, _ = await asyncio.wait({slot, disconnect}, timeout=limiter.budget,
+                                         return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            disconnect.cancel()
+        if slot in done and not slot.cancelled():
+            return None
+        limiter.abandon(slot)
+        return "disconnected" if channel.disconnected.is_set() else "budget"
+
+    async def _reject(self, send, limiter: RouteLimiter, reason: str):
+        body = json.dumps({"error": "Server is busy, please retry shortly", "route": limiter.route,
+                           "reason": reason}).encode("utf-8")
+        await send({"type": "http.response.start", "status": 503,
+                    "headers": [(b"content-type", b"application/json"),
+                                (b"retry-after", str(limiter.retry_after()).encode()),
+                                (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+
+def admission_stats() -> dict:
+    return {route: limiter.stats() for route, limiter in limiters().items()}
+
+
+GaugeFunc("admission_active", "Requests holding an admission slot, by route",
+          lambda: {(("route", r),): l.active for r, l in limiters().items()})
+GaugeFunc("admission_queued", "Requests waiting for an admission slot, by route",
+          lambda: {(("route", r),): len(l.waiters) for r, l in limiters().items()})
@@ -0,0 +1,149 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from metrics import GaugeFunc
+from tracing import span
+
+# 🗄️ Managed artifact store
+# Generated files (.docx/.pptx/.xlsx/.md/.pdf/.png/.mp3) and uploads live in sharded
+# directories under ARTIFACT_DIR. Every artifact has a TTL, and the store as a whole has a
+# disk quota enforced by evicting the least recently accessed artifacts.
+
+ARTIFACT_DIR = Path(os.getenv("ARTIFACT_DIR", Path(tempfile.gettempdir()) / "job_helper_artifacts"))
+ARTIFACT_TTL_SECONDS = int(os.getenv("ARTIFACT_TTL_SECONDS", str(24 * 3600)))
+ARTIFACT_QUOTA_MB = float(os.getenv("ARTIFACT_QUOTA_MB", "1024"))
+ARTIFACT_SWEEP_SECONDS = int(os.getenv("ARTIFACT_SWEEP_SECONDS", "300"))
+
+
+@dataclass
+class Artifact:
+    name: str
+    path: Path
+    size: int
+    expires: float
+    last_access: float
+
+
+def safe_name(name: str) -> str:
+    return re.sub(r"[^\w.\-]", "_", Path(name.strip()).name)
+
+
+class ArtifactStore:
+    def __init__(self, root: Path = ARTIFACT_DIR, quota_mb: float = ARTIFACT_QUOTA_MB,
+                 ttl: int = ARTIFACT_TTL_SECONDS):
+        self.root = Path(root)
+        self.quota = int(quota_mb * 1024 * 1024)
+        self.ttl = ttl
+        self._index = OrderedDict()
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._last_sweep = 0.0
+        self.counters = {"saved": 0, "expired": 0, "evicted": 0}
+
+    def _path(self, name: str) -> Path:
+        shard = hashlib.sha1(name.encode("utf-8")).hexdigest()[:2]
+        return self.root / shard / name
+
+    def _load(self):
+        # Rebuild the index from disk once, oldest access first.
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.root.exists():
+            return
+        found = []
+        for path in self.root.glob("*/*"):
+            if path.is_file():
+                stat = path.stat()
+                found.append(Artifact(path.name, path, stat.st_size, stat.st_mtime + self.ttl, stat.st_mtime))
+        for artifact in sorted(found, key=lambda a: a.last_access):
+            self._index[artifact.name] = artifact
+
+    def save(self, suffix: str, write, name: str = "", prefix: str = "", ttl: int = None) -> Path:
+        # write(path) produces the file, e.g. doc.save / img.save / pdf.output.
+        filename = f"{safe_name(name)}{suffix}" if name else f"{prefix}{uuid.uuid4().hex}{suffix}"
+        path = self._path(filename)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with span("artifact.save", artifact=filename):
+            write(path)
+        now = time.time()
+        artifact = Artifact(filename, path, path.stat().st_size, now + (ttl or self.ttl), now)
+        with self._lock:
+            self._load()
+            self._index.pop(filename, None)
+            self._index[filename] = artifact
+            self.counters["saved"] += 1
+        self._maintain(protect=filename)
+        return path
+
+    def exists(self, name: str) -> bool:
+        return self.get(name, touch=False) is not None
+
+    def get(self, name: str, touch: bool = True):
+        name = safe_name(name)
+        with self._lock:
+            self._load()
+            artifact = self._index.get(name)
+            if artifact is None:
+                return None
+            if artifact.expires < time.time() or not artifact.path.exists():
+                self._remove(artifact, "expired")
+                return None
+            if touch:
+                artifact.last_access = time.time()
+                self._index.move_to_end(name)
+        return artifact.path
+
+    def delete(self, name: str):
+        with self._lock:
+            artifact = self._index.get(safe_name(name))
+            if artifact:
+                self._remove(artifact, None)
+
+    def _remove(self, artifact: Artifact, reason):
+        self._index.pop(artifact.name, None)
+        try:
+            artifact.path.unlink()
+        except OSError:
+            pass
+        if reason:
+            self.counters[reason] += 1
+
+    def _maintain(self, protect: str = ""):
+        with self._lock:
+            now = time.time()
+            if now - self._last_sweep >= ARTIFACT_SWEEP_SECONDS:
+                self._last_sweep = now
+                for artifact in [a for a in self._index.values() if a.expires < now]:
+                    self._remove(artifact, "expired")
+            total = sum(a.size for a in self._index.values())
+            for artifact in list(self._index.values()):
+                if total <= self.quota:
+                    break
+                if artifact.name == protect:
+                    continue
+                total -= artifact.size
+                self._remove(artifact, "evicted")
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._load()
+            return {
+                **self.counters,
+                "artifacts": len(self._index),
+                "bytes": sum(a.size for a in self._index.values()),
+                "quota_bytes": self.quota,
+            }
+
+
+artifacts = ArtifactStore()
+
+GaugeFunc("artifact_store_bytes", "Bytes of generated artifacts on disk", lambda: artifacts.stats()["bytes"])
+GaugeFunc("artifact_store_artifacts", "Number of artifacts in the store", lambda: artifacts.stats()["artifacts"])
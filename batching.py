@@ -0,0 +1,88 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# 📦 Dynamic micro-batching
+# Concurrent prompts for the same text2text model and generation params are held for up to
+# BATCH_MAX_WAIT_MS, padded into one batched pipeline call and split back to their callers.
+# A batch gets the latest of its members' deadlines (none if any member has none), so one
+# caller's short deadline never truncates the others' outputs.
+
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "10"))
+
+
+class MicroBatcher:
+    def __init__(self, name: str, run_batch, max_size: int = BATCH_MAX_SIZE, max_wait_ms: float = BATCH_MAX_WAIT_MS):
+        self.name = name
+        self.run_batch = run_batch
+        self.max_size = max_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name=f"batcher-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, prompt: str, at=None) -> Future:
+        future = Future()
+        self._queue.put((prompt, future, at))
+        return future
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = [(p, f, at) for p, f, at in self._collect() if f.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            ats = [at for _, _, at in batch]
+            batch_at = None if None in ats else max(ats)
+            try:
+                outputs = self.run_batch([prompt for prompt, _, _ in batch], batch_at)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), output in zip(batch, outputs):
+                future.set_result(output)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "waiting": self._queue.qsize(),
+        }
+
+
+_batchers = {}
+_lock = threading.Lock()
+
+
+def get_batcher(key: tuple, run_batch) -> MicroBatcher:
+    with _lock:
+        if key not in _batchers:
+            _batchers[key] = MicroBatcher(key[0], run_batch)
+        return _batchers[key]
+
+
+def batch_stats() -> dict:
+    with _lock:
+        batchers = dict(_batchers)
+    return {f"{key[0]} {dict(key[1])}": b.stats() for key, b in batchers.items()}
@@ -0,0 +1,257 @@
+import argparse
+import io
+import json
+import platform
+import resource
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 🏋️ HTTP load test for the combined app
+# Boots main:app in-process with stub models/services (bench_stubs), drives concurrent requests
+# against every tool's endpoints and writes req/s, latency percentiles and peak RSS as JSON.
+#
+#   python bench_load.py --concurrency 8 --requests 200 --out bench_load.json
+#   python bench_load.py --compare bench_load.json      # exits 1 on a regression beyond --tolerance
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# === Sample inputs ===
+def sample_xlsx(rows: int = 200) -> bytes:
+    from openpyxl import Workbook
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Price", "Qty"])
+    for i in range(rows):
+        ws.append([i * 1.5, i % 7])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def sample_pptx(slides: int = 5) -> bytes:
+    from pptx import Presentation
+    prs = Presentation()
+    for i in range(slides):
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = f"Slide {i + 1}"
+        slide.placeholders[1].text = "Quarterly growth, customer feedback and launch plan."
+    buf = io.BytesIO()
+    prs.save(buf)
+    return buf.getvalue()
+
+
+# === Scenarios ===
+# Each scenario: (name, method, path, request(i, state) -> requests kwargs, setup(session, base) -> state)
+def _excel_setup(session, base):
+    r = session.post(f"{base}/excel/upload/", files={"file": ("data.xlsx", sample_xlsx(), "application/octet-stream")})
+    r.raise_for_status()
+    return r.json()["session_id"]
+
+
+SCENARIOS = [
+    ("excel.upload", "POST", "/excel/upload/",
+     lambda i, s: {"files": {"file": (f"data{i}.xlsx", s, "application/octet-stream")}}, lambda session, base: sample_xlsx()),
+    ("excel.options", "POST", "/excel/options/",
+     lambda i, s: {"json": {"session_id": s, "user_instruction": f"total price and qty {i % 5}"}}, _excel_setup),
+    ("word.generate", "POST", "/word/generate-docx-ui",
+     lambda i, s: {"data": {"title": f"Report {i}", "content": s, "format": "markdown", "summarize": "true",
+                            "grammar_check": "true"}},
+     lambda session, base: "\n\n".join(f"## Section {n}\n\n- point one\n- point two\n\n" + "Lorem ipsum dolor sit amet. " * 20
+                                       for n in range(10))),
+    ("ppt.generate", "POST", "/ppt/generate/",
+     lambda i, s: {"data": {"topic": f"Marketing plan {i % 20}"}}, None),
+    ("ppt.upload", "POST", "/ppt/upload/",
+     lambda i, s: {"files": {"file": ("deck.pptx", s, "application/octet-stream")}, "data": {"task": "Summarize into slides"}},
+     lambda session, base: sample_pptx()),
+    ("blog.generate", "POST", "/blog/generate/",
+     lambda i, s: {"data": {"topic": f"Remote work tips {i % 20}", "generate_pdf": "true", "summarize": "true"}}, None),
+    ("seo.analysis", "POST", "/seo/seo",
+     lambda i, s: {"data": {"keyword": f"running shoes {i % 20}", "competitors": "nike.com,adidas.com"}}, None),
+    ("tts.generate", "POST", "/tts/tts/generate",
+     lambda i, s: {"data": {"text": f"Welcome to our store, offer number {i}.", "language": "english"}}, None),
+    ("code.generate", "POST", "/code/generate",
+     lambda i, s: {"json": {"task": f"todo app {i % 20}", "model": "mistral", "overwrite": True}}, None),
+]
+
+
+def run_scenario(base: str, scenario, requests_total: int, concurrency: int) -> dict:
+    import requests
+
+    name, method, path, build, setup = scenario
+    with requests.Session() as session:
+        state = setup(session, base) if setup else None
+
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+    counter = iter(range(requests_total))
+    peak = {"rss": rss_mb()}
+    done = threading.Event()
+
+    def sample_rss():
+        while not done.is_set():
+            peak["rss"] = max(peak["rss"], rss_mb())
+            done.wait(0.05)
+
+    def worker():
+        with requests.Session() as session:
+            while True:
+                with lock:
+                    i = next(counter, None)
+                if i is None:
+                    return
+                started = time.perf_counter()
+                try:
+                    status = session.request(method, f"{base}{path}", timeout=300, **build(i, state)).status_code
+                except requests.RequestException:
+                    status = "error"
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    statuses[status] = statuses.get(status, 0) + 1
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    seconds = time.perf_counter() - started
+    done.set()
+    sampler.join()
+
+    errors = sum(n for status, n in statuses.items() if status == "error" or status >= 400)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "seconds": round(seconds, 3),
+        "req_per_s": round(len(latencies) / seconds, 2) if seconds else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "peak_rss_mb": round(peak["rss"], 1),
+    }
+
+
+def start_server(app, port: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="bench-server", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("Server failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for name, current in result["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        if before["req_per_s"] and current["req_per_s"] < before["req_per_s"] * (1 - tolerance):
+            regressions.append(f"{name}: req/s {before['req_per_s']} → {current['req_per_s']}")
+        if before["p95_ms"] and current["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']} ms → {current['p95_ms']} ms")
+        if current["errors"] > before["errors"]:
+            regressions.append(f"{name}: errors {before['errors']} → {current['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load test for main:app with stub models")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--only", default="", help="Comma-separated scenario names (default: all)")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests per scenario")
+    parser.add_argument("--out", default="", help="Write JSON results to this file")
+    parser.add_argument("--compare", default="", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    import bench_stubs
+    app = bench_stubs.install()
+    server, thread = start_server(app, args.port)
+    base = f"http://127.0.0.1:{args.port}"
+
+    only = {s.strip() for s in args.only.split(",") if s.strip()}
+    result = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+            "stub_latency_ms": bench_stubs.STUB_LATENCY_MS,
+            "stub_ms_per_token": bench_stubs.STUB_MS_PER_TOKEN,
+            "stub_network_ms": bench_stubs.STUB_NETWORK_MS,
+            "started": time.time(),
+        },
+        "scenarios": {},
+    }
+    try:
+        for scenario in SCENARIOS:
+            if only and scenario[0] not in only:
+                continue
+            if args.warmup:
+                run_scenario(base, scenario, args.warmup, 1)
+            stats = run_scenario(base, scenario, args.requests, args.concurrency)
+            result["scenarios"][scenario[0]] = stats
+            print(f"📈 {scenario[0]:<14} {stats['req_per_s']:>8.2f} req/s  p50 {stats['p50_ms']:>8.1f} ms  "
+                  f"p95 {stats['p95_ms']:>8.1f} ms  p99 {stats['p99_ms']:>8.1f} ms  errors {stats['errors']}")
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    output = json.dumps(result, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+        print(f"✅ Results written to {args.out}")
+    else:
+        print(output)
+
+    if args.compare:
+        regressions = compare(result, json.loads(Path(args.compare).read_text(encoding="utf-8")), args.tolerance)
+        for line in regressions:
+            print(f"❌ {line}")
+        if regressions:
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
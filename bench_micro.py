@@ -0,0 +1,231 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# ⏱️ Micro-benchmarks for document builders and model call paths
+# Times the hot functions in isolation (no HTTP), with stub models from bench_stubs so model
+# paths measure registry/executor/batching overhead rather than real inference.
+#
+#   python bench_micro.py --save-baseline bench_micro_baseline.json
+#   python bench_micro.py --baseline bench_micro_baseline.json   # exits 1 on a regression
+#   python bench_micro.py --only excel --sizes 10000,100000
+
+os.environ.setdefault("STUB_LATENCY_MS", "0")
+os.environ.setdefault("STUB_MS_PER_TOKEN", "0")
+
+BENCHMARKS = []
+
+
+def benchmark(name: str, repeat: int = 10):
+    # The decorated factory does the (untimed) setup and returns the callable to time.
+    def decorator(factory):
+        BENCHMARKS.append((name, repeat, factory))
+        return factory
+    return decorator
+
+
+def long_markdown(sections: int, words_per_section: int = 120) -> str:
+    from bench_stubs import stub_text
+    return "\n\n".join(f"## Section {i}\n\n{stub_text(f'section {i}', words_per_section)}\n\n- first point\n- second point"
+                       for i in range(sections))
+
+
+def dataframe(rows: int):
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({"Price": rng.random(rows) * 100, "Qty": rng.integers(1, 10, rows)})
+
+
+def register_sized(sizes: list):
+    import EXCEL
+    from openpyxl import Workbook
+
+    for rows in sizes:
+        @benchmark(f"excel.apply_formula_all_rows[{rows}]", repeat=5 if rows <= 100_000 else 1)
+        def _apply(rows=rows):
+            def run():
+                ws = Workbook().active
+                EXCEL.apply_formula_all_rows(ws, "=SUM(A2:B2)", start_row=2, target_col=3, max_row=rows + 1)
+            return run
+
+        @benchmark(f"excel.apply_excel_logic_with_formula[{rows}]", repeat=5 if rows <= 100_000 else 1)
+        def _logic(rows=rows):
+            df = dataframe(rows)
+            return lambda: EXCEL.apply_excel_logic_with_formula(df, "total of price and qty")
+
+
+@benchmark("word.generate_doc[markdown, 2000 sections]", repeat=5)
+def _word_markdown():
+    import word
+    content = long_markdown(2000, 60)
+    return lambda: word.generate_doc("Benchmark", content, "markdown")
+
+
+@benchmark("word.generate_doc[text, 2000 lines]", repeat=5)
+def _word_text():
+    import word
+    from bench_stubs import stub_text
+    content = stub_text("word text", 24000)
+    return lambda: word.generate_doc("Benchmark", content, "text")
+
+
+@benchmark("ppt.create_ppt[300 sections]", repeat=5)
+def _ppt():
+    import ppt
+    content = long_markdown(300, 40)
+    return lambda: ppt.create_ppt(content)
+
+
+@benchmark("blog.markdown_to_pdf[20k words]", repeat=5)
+def _pdf():
+    import smart_pdf_blog_ai
+    md = long_markdown(160, 125)
+    return lambda: smart_pdf_blog_ai.markdown_to_pdf(md)
+
+
+@benchmark("seo.generate_poster", repeat=20)
+def _poster():
+    import smart_marketing_ai
+    return lambda: smart_marketing_ai.generate_poster("Running Shoes", "Best offer on running shoes!")
+
+
+# Model call paths with fixed prompts (generation cache disabled by bench_stubs).
+@benchmark("model.generate_text[ppt.qa text2text]", repeat=50)
+def _model_t2t():
+    from inference import generate_text
+    return lambda: generate_text("ppt.qa", "Create a detailed and structured slide presentation on: AI", max_length=256)
+
+
+@benchmark("model.generate_text[excel.phi text-generation]", repeat=50)
+def _model_causal():
+    from inference import generate_text
+    return lambda: generate_text("excel.phi", "Generate only Excel formula for: total of price\nFormula:", max_length=100)
+
+
+@benchmark("model.generate_text[word.summarizer summarization]", repeat=50)
+def _model_summary():
+    from inference import generate_text
+    text = long_markdown(4, 100)
+    return lambda: generate_text("word.summarizer", text, max_length=1024, min_length=100, do_sample=False)
+
+
+@benchmark("model.detect_type[word.classifier]", repeat=50)
+def _model_classifier():
+    import word
+    return lambda: word.detect_type("Quarterly revenue report for the sales team.")
+
+
+# === Runner ===
+def time_runs(fn, repeat: int, budget: float) -> list:
+    durations = []
+    started = time.perf_counter()
+    while len(durations) < repeat and (not durations or time.perf_counter() - started < budget):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - t0)
+    return durations
+
+
+def measure_allocations(fn) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    return {
+        "peak_kb": round(peak / 1024, 1),
+        "retained_kb": round(sum(s.size_diff for s in stats) / 1024, 1),
+        "blocks": sum(s.count_diff for s in stats),
+    }
+
+
+def summarize(durations: list) -> dict:
+    ms = sorted(d * 1000 for d in durations)
+    p95 = ms[min(len(ms) - 1, round(0.95 * (len(ms) - 1)))]
+    return {
+        "runs": len(ms),
+        "min_ms": round(ms[0], 3),
+        "median_ms": round(statistics.median(ms), 3),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p95_ms": round(p95, 3),
+        "max_ms": round(ms[-1], 3),
+        "stdev_ms": round(statistics.stdev(ms), 3) if len(ms) > 1 else 0.0,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get("benchmarks", {}).get(name)
+        if not before:
+            continue
+        if current["median_ms"] > before["median_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: median {before['median_ms']} ms → {current['median_ms']} ms")
+        if current["alloc"]["peak_kb"] > before["alloc"]["peak_kb"] * (1 + tolerance):
+            regressions.append(f"{name}: peak alloc {before['alloc']['peak_kb']} KB → {current['alloc']['peak_kb']} KB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for builders and model call paths")
+    parser.add_argument("--only", default="", help="Run benchmarks whose name contains this text")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Excel row counts")
+    parser.add_argument("--repeat", type=int, default=0, help="Override runs per benchmark")
+    parser.add_argument("--budget", type=float, default=30.0, help="Stop repeating a benchmark after this many seconds")
+    parser.add_argument("--no-alloc", action="store_true", help="Skip the tracemalloc run")
+    parser.add_argument("--out", default="", help="Write JSON results to this file")
+    parser.add_argument("--save-baseline", default="", help="Write results as the new baseline")
+    parser.add_argument("--baseline", default="", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    import bench_stubs
+    bench_stubs.install()
+    register_sized([int(s) for s in args.sizes.split(",") if s.strip()])
+
+    results = {}
+    for name, repeat, factory in BENCHMARKS:
+        if args.only and args.only not in name:
+            continue
+        fn = factory()
+        fn()  # warm-up: model load, imports, first-call caches
+        stats = summarize(time_runs(fn, args.repeat or repeat, args.budget))
+        stats["alloc"] = {} if args.no_alloc else measure_allocations(fn)
+        results[name] = stats
+        alloc = f"  peak {stats['alloc']['peak_kb'] / 1024:>8.1f} MB" if stats["alloc"] else ""
+        print(f"⏱️ {name:<52} median {stats['median_ms']:>10.2f} ms  p95 {stats['p95_ms']:>10.2f} ms{alloc}")
+
+    output = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "started": time.time()},
+        "benchmarks": results,
+    }
+    for path in (args.out, args.save_baseline):
+        if path:
+            Path(path).write_text(json.dumps(output, indent=2), encoding="utf-8")
+            print(f"✅ Results written to {path}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text(encoding="utf-8")), args.tolerance)
+        for line in regressions:
+            print(f"❌ {line}")
+        if regressions:
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import argparse
+import difflib
+import gc
+import json
+import os
+import platform
+import statistics
+import time
+from pathlib import Path
+
+# 🎚️ Precision benchmark: fp32 vs bf16 vs dynamic int8
+# Loads each module's real model at every precision and runs that module's own prompt templates,
+# reporting load time, weight bytes, RSS growth, latency and output agreement with fp32.
+#
+#   python bench_precision.py --models excel.phi,seo.generator --precisions fp32,bf16,int8 --out precision.json
+
+os.environ.setdefault("GEN_CACHE_ENABLED", "0")
+os.environ.setdefault("BATCHING_ENABLED", "0")
+
+
+def module_prompts() -> dict:
+    # (prompts, generation params) exactly as each module builds them.
+    import ppt
+    import smart_pdf_blog_ai
+
+    instructions = ["total of price and quantity", "average of column B", "count rows where status is done"]
+    products = ["running shoes", "wireless earbuds", "organic green tea"]
+    return {
+        "excel.phi": [(f"Generate only Excel formula for: {i}\nFormula:", {"max_length": 100}) for i in instructions]
+                     + [(f"User command: {i}\nWhat should be done (explain in 1 line):", {"max_length": 80}) for i in instructions],
+        "seo.generator": [(f"Create an SEO-friendly title for product: {p}", {"max_length": 60}) for p in products]
+                         + [(f"Write a 150 character SEO meta description for: {p}", {"max_length": 80}) for p in products],
+        "blog.writer": [(smart_pdf_blog_ai.blog_prompt(t), {"max_length": 1024, "return_full_text": False})
+                        for t in ("remote work tips", "healthy breakfast ideas")],
+        "blog.summarizer": [("Remote work lets teams hire anywhere and cut commuting. " * 30, {"max_length": 512, "min_length": 100})],
+        "ppt.qa": [(ppt.content_prompt(t), {"max_length": 1024}) for t in ("quarterly sales review", "product launch plan")],
+    }
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def agreement(reference: list, outputs: list) -> dict:
+    exact = sum(a == b for a, b in zip(reference, outputs))
+    ratios = [difflib.SequenceMatcher(None, a.split(), b.split()).ratio() for a, b in zip(reference, outputs)]
+    return {"exact_match": round(exact / len(reference), 3), "token_similarity": round(statistics.fmean(ratios), 3)}
+
+
+def bench_model(name: str, cases: list, precision: str, repeat: int, max_length: int) -> dict:
+    import torch
+    import model_registry
+    from inference import generate_text
+
+    variant = model_registry.precision_variant(name, precision)
+    gc.collect()
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    pipe = model_registry.get_model(variant)
+    load_seconds = time.perf_counter() - started
+
+    outputs, latencies = [], []
+    try:
+        for prompt, params in cases:
+            if max_length:
+                params = {**params, "max_length": min(params.get("max_length", max_length), max_length)}
+            for run in range(repeat):
+                torch.manual_seed(0)
+                t0 = time.perf_counter()
+                text = generate_text(variant, prompt, **params)
+                latencies.append(time.perf_counter() - t0)
+                if run == 0:
+                    outputs.append(text)
+        return {
+            "load_seconds": round(load_seconds, 2),
+            "weight_mb": round(model_registry.model_nbytes(pipe) / 1e6, 1),
+            "rss_growth_mb": round(rss_mb() - rss_before, 1),
+            "median_ms": round(statistics.median(latencies) * 1000, 1),
+            "mean_ms": round(statistics.fmean(latencies) * 1000, 1),
+            "max_ms": round(max(latencies) * 1000, 1),
+            "outputs": outputs,
+        }
+    finally:
+        del pipe
+        model_registry.unload_model(variant)
+        gc.collect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare fp32 / bf16 / int8 model precision per module")
+    parser.add_argument("--models", default="excel.phi,seo.generator,blog.writer,blog.summarizer,ppt.qa")
+    parser.add_argument("--precisions", default="fp32,bf16,int8")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per prompt")
+    parser.add_argument("--max-length", type=int, default=0, help="Cap max_length to keep large models quick")
+    parser.add_argument("--out", default="", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    import bench_stubs
+    bench_stubs.ensure_optional_modules()
+    prompts = module_prompts()
+    precisions = [p.strip() for p in args.precisions.split(",") if p.strip()]
+    if "fp32" not in precisions:
+        precisions.insert(0, "fp32")
+
+    results = {}
+    for name in [m.strip() for m in args.models.split(",") if m.strip()]:
+        results[name] = {}
+        for precision in precisions:
+            print(f"🎚️ {name} @ {precision} ...")
+            results[name][precision] = bench_model(name, prompts[name], precision, args.repeat, args.max_length)
+        reference = results[name]["fp32"]
+        for precision, stats in results[name].items():
+            stats["agreement"] = agreement(reference["outputs"], stats["outputs"])
+            stats["speedup"] = round(reference["median_ms"] / stats["median_ms"], 2) if stats["median_ms"] else 0.0
+            print(f"   {precision:<5} median {stats['median_ms']:>9.1f} ms  x{stats['speedup']:<5} "
+                  f"weights {stats['weight_mb']:>8.1f} MB  rss +{stats['rss_growth_mb']:>8.1f} MB  "
+                  f"exact {stats['agreement']['exact_match']:.2f}  similarity {stats['agreement']['token_similarity']:.2f}")
+
+    output = json.dumps({"meta": {"python": platform.python_version(), "platform": platform.platform(),
+                                  "repeat": args.repeat, "max_length_cap": args.max_length}, "models": results},
+                        indent=2, ensure_ascii=False)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+        print(f"✅ Results written to {args.out}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import time
+from pathlib import Path
+
+# 🎯 Assisted (speculative) decoding benchmark for blog.writer
+# Runs the blog prompts through dolly-v2-3b with plain greedy decoding, then with the draft model
+# (blog.draft, EleutherAI/pythia-160m by default) as assistant_model, and reports generated
+# tokens/sec, speedup, and whether each assisted output is token-for-token identical to the
+# greedy one (and where it first diverges if not).
+#
+#   python bench_speculative.py --max-new-tokens 256 --assistant-tokens 3,5,8 --out speculative.json
+
+os.environ.setdefault("GEN_CACHE_ENABLED", "0")
+
+TOPICS = ["remote work tips", "healthy breakfast ideas", "how to learn Python", "saving for retirement"]
+
+
+def first_divergence(a: list, b: list):
+    for i, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            return i
+    return None if len(a) == len(b) else min(len(a), len(b))
+
+
+def run(model, tokenizer, prompts: list, max_new_tokens: int, repeat: int, assistant=None) -> dict:
+    import torch
+
+    outputs, rates = [], []
+    for prompt in prompts:
+        inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+        extra = {"assistant_model": assistant} if assistant is not None else {}
+        for attempt in range(repeat):
+            t0 = time.perf_counter()
+            with torch.no_grad():
+                ids = model.generate(**inputs, max_new_tokens=max_new_tokens, do_sample=False,
+                                     pad_token_id=tokenizer.eos_token_id, **extra)
+            seconds = time.perf_counter() - t0
+            new = ids[0, inputs["input_ids"].shape[1]:].tolist()
+            rates.append(len(new) / seconds)
+            if attempt == 0:
+                outputs.append(new)
+    return {"tokens_per_s": round(statistics.median(rates), 2), "outputs": outputs}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tokens/sec and output equivalence of assisted vs greedy decoding")
+    parser.add_argument("--topics", default=",".join(TOPICS))
+    parser.add_argument("--max-new-tokens", type=int, default=256)
+    parser.add_argument("--assistant-tokens", default="5", help="num_assistant_tokens values to try")
+    parser.add_argument("--repeat", type=int, default=2, help="Timed runs per prompt")
+    parser.add_argument("--out", default="", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    import bench_stubs
+    bench_stubs.ensure_optional_modules()
+    import smart_pdf_blog_ai
+    from model_registry import get_model
+
+    prompts = [smart_pdf_blog_ai.blog_prompt(t.strip()) for t in args.topics.split(",") if t.strip()]
+    writer, draft = get_model("blog.writer"), get_model("blog.draft")
+    model, tokenizer = writer.model, writer.tokenizer
+    # dolly adds a few instruction tokens on top of the GPT-NeoX vocabulary, so compare encodings, not vocabs.
+    if any(draft.tokenizer(p)["input_ids"] != tokenizer(p)["input_ids"] for p in prompts):
+        raise SystemExit(f"❌ {smart_pdf_blog_ai.BLOG_DRAFT_MODEL} doesn't tokenize like blog.writer")
+
+    print(f"🎯 greedy ({len(prompts)} prompts, {args.max_new_tokens} new tokens) ...")
+    greedy = run(model, tokenizer, prompts, args.max_new_tokens, args.repeat)
+    print(f"   greedy            {greedy['tokens_per_s']:>8.2f} tok/s")
+
+    results = {}
+    for n in [int(v) for v in args.assistant_tokens.split(",") if v.strip()]:
+        draft.model.generation_config.num_assistant_tokens = n
+        draft.model.generation_config.num_assistant_tokens_schedule = "constant"  # keep k fixed per run
+        assisted = run(model, tokenizer, prompts, args.max_new_tokens, args.repeat, assistant=draft.model)
+        divergence = [first_divergence(g, a) for g, a in zip(greedy["outputs"], assisted["outputs"])]
+        results[str(n)] = {
+            "tokens_per_s": assisted["tokens_per_s"],
+            "speedup": round(assisted["tokens_per_s"] / greedy["tokens_per_s"], 2) if greedy["tokens_per_s"] else 0.0,
+            "identical": sum(d is None for d in divergence),
+            "first_divergence": divergence,
+        }
+        r = results[str(n)]
+        print(f"   assisted (k={n:<2})   {r['tokens_per_s']:>8.2f} tok/s  x{r['speedup']:<5} "
+              f"identical {r['identical']}/{len(prompts)}")
+
+    output = json.dumps({"meta": {"python": platform.python_version(), "platform": platform.platform(),
+                                  "draft": smart_pdf_blog_ai.BLOG_DRAFT_MODEL, "prompts": len(prompts),
+                                  "max_new_tokens": args.max_new_tokens, "repeat": args.repeat},
+                         "greedy_tokens_per_s": greedy["tokens_per_s"], "assisted": results}, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+        print(f"✅ Results written to {args.out}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import hashlib
+import os
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+
+# 🧪 Deterministic stubs for benchmarks
+# install() boots main:app with every registered model replaced by a stub pipeline and every
+# external service (SerpAPI, DuckDuckGo, Google Trends, gTTS, Google Translate, gpt-engineer)
+# replaced by a fixed-latency fake, so benchmarks need no downloads, no network and no Office.
+
+STUB_LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "20"))
+STUB_MS_PER_TOKEN = float(os.getenv("STUB_MS_PER_TOKEN", "0.2"))
+STUB_NETWORK_MS = float(os.getenv("STUB_NETWORK_MS", "50"))
+
+WORDS = ("smart", "fast", "product", "growth", "market", "design", "value", "customer",
+         "data", "report", "quality", "launch", "team", "offer", "simple", "future")
+
+# Models registered with a custom loader carry no task.
+CUSTOM_TASKS = {"tts.bark": "text-to-speech"}
+
+# Windows-only automation (live Excel/Word/PowerPoint editing) and desktop GUI modules.
+OPTIONAL_MODULES = ("win32com", "win32com.client", "pythoncom", "comtypes", "comtypes.client", "xlwings",
+                    "tkinter", "tkinter.filedialog", "tkinter.simpledialog", "tkinter.messagebox")
+
+
+def _sleep(ms: float):
+    if ms > 0:
+        time.sleep(ms / 1000)
+
+
+def stub_text(seed: str, n_words: int) -> str:
+    digest = hashlib.sha256(seed.encode("utf-8")).digest()
+    words = [WORDS[digest[i % len(digest)] % len(WORDS)] for i in range(n_words)]
+    lines = []
+    for i in range(0, len(words), 12):
+        line = " ".join(words[i:i + 12])
+        lines.append(f"## {line.title()}" if i % 60 == 0 else line)
+    return "\n".join(lines)
+
+
+class StubTokenizer:
+    def __call__(self, text, add_special_tokens=True, **kwargs):
+        return {"input_ids": list(range(len(str(text).split())))}
+
+
+class StubPipeline:
+    def __init__(self, name: str, task: str):
+        self.name = name
+        self.task = task or "text-generation"
+        self.tokenizer = StubTokenizer()
+
+    def _one(self, prompt, params: dict):
+        tokens = params.get("max_new_tokens") or params.get("max_length") or 64
+        if self.task == "text-classification":
+            return [{"label": "REPORT", "score": 0.99}]
+        if self.task == "feature-extraction":
+            digest = hashlib.sha256(str(prompt).lower().encode("utf-8")).digest()
+            return [[[b / 255 for b in digest]]]
+        if self.task == "text-to-speech":
+            return [{"audio": b"ID3" + bytes(1024), "sampling_rate": 24000}]
+        if "Formula:" in str(prompt):
+            text = "=SUM(A2:B2)"
+        else:
+            text = stub_text(f"{self.name}:{prompt}", min(int(tokens * 0.75), 768))
+        if self.task == "summarization":
+            return [{"summary_text": text}]
+        if self.task == "text-generation" and params.get("return_full_text", True):
+            text = f"{prompt} {text}"
+        return [{"generated_text": text}]
+
+    def __call__(self, inputs, **params):
+        prompts = inputs if isinstance(inputs, list) else [inputs]
+        tokens = params.get("max_new_tokens") or params.get("max_length") or 64
+        _sleep((STUB_LATENCY_MS + STUB_MS_PER_TOKEN * tokens) * (1 + 0.1 * (len(prompts) - 1)))
+        outputs = [self._one(p, params) for p in prompts]
+        return outputs if isinstance(inputs, list) else outputs[0]
+
+
+# === External services ===
+class StubGoogleSearch:
+    def __init__(self, params: dict):
+        self.params = params
+
+    def get_dict(self) -> dict:
+        _sleep(STUB_NETWORK_MS)
+        q = self.params.get("q", "")
+        return {
+            "suggestions": [{"value": f"{q} {w}"} for w in WORDS[:8]],
+            "organic_results": [{"link": f"https://{w}.example.com/{q}"} for w in WORDS[:10]],
+        }
+
+
+class StubDDGS:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def text(self, query, max_results=1):
+        _sleep(STUB_NETWORK_MS)
+        return [{"title": query, "href": f"https://{query}", "body": stub_text(query, 30)}][:max_results]
+
+
+class StubTrendReq:
+    def __init__(self, *args, **kwargs):
+        self.keywords = []
+
+    def build_payload(self, keywords, **kwargs):
+        self.keywords = keywords
+
+    def interest_over_time(self):
+        import pandas as pd
+        _sleep(STUB_NETWORK_MS)
+        index = pd.date_range("2024-01-01", periods=60, freq="min")
+        return pd.DataFrame({k: range(60) for k in self.keywords}, index=index)
+
+
+class StubGTTS:
+    def __init__(self, text: str, lang: str = "en"):
+        self.text = text
+
+    def save(self, path):
+        _sleep(STUB_NETWORK_MS)
+        with open(path, "wb") as f:
+            f.write(b"ID3" + bytes(len(self.text) * 16))
+
+
+class StubTranslator:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def translate(self, text: str) -> str:
+        _sleep(STUB_NETWORK_MS)
+        return text
+
+
+def _stub_loader(spec):
+    return lambda: StubPipeline(spec.name, spec.task or CUSTOM_TASKS.get(spec.name, ""))
+
+
+def _stub_subprocess():
+    import subprocess
+
+    def run(*args, **kwargs):
+        _sleep(STUB_LATENCY_MS)
+        return subprocess.CompletedProcess(args, 0)
+    return types.SimpleNamespace(run=run, CalledProcessError=subprocess.CalledProcessError)
+
+
+def ensure_optional_modules():
+    for name in OPTIONAL_MODULES:
+        try:
+            __import__(name)
+        except ImportError:
+            module = sys.modules[name] = types.ModuleType(name)
+            parent, _, child = name.rpartition(".")
+            if parent in sys.modules:
+                setattr(sys.modules[parent], child, module)
+
+
+def install():
+    # Must run before anything imports main / the tool modules.
+    workdir = Path(tempfile.mkdtemp(prefix="job_helper_bench_"))
+    os.environ.setdefault("ARTIFACT_DIR", str(workdir / "artifacts"))
+    os.environ.setdefault("GEN_CACHE_DIR", str(workdir / "gen_cache"))
+    os.environ.setdefault("GEN_CACHE_ENABLED", "0")
+    os.environ.setdefault("PREFIX_CACHE_ENABLED", "0")  # stubs have no KV cache
+    os.environ.setdefault("SINGLEFLIGHT_ENABLED", "0")  # repeated prompts would collapse into one call
+    os.environ.setdefault("TIERING_ENABLED", "0")  # keep every run on the same models
+    os.environ.setdefault("SERP_API_KEY", "bench-stub")
+    os.environ["PREWARM_MODELS"] = ""
+    ensure_optional_modules()
+
+    import main
+    import model_registry
+    import smart_marketing_ai
+    import tts_generator
+    import word
+    import codding_pro
+
+    model_registry.override_loaders(_stub_loader)
+    smart_marketing_ai.GoogleSearch = StubGoogleSearch
+    smart_marketing_ai.DDGS = StubDDGS
+    smart_marketing_ai.TrendReq = StubTrendReq
+    tts_generator.gTTS = StubGTTS
+    word.GoogleTranslator = StubTranslator
+    codding_pro.GoogleTranslator = StubTranslator
+    codding_pro.subprocess = _stub_subprocess()
+    codding_pro.GPT_ENGINEER_DIR = workdir / "gpt-engineer"
+    codding_pro.WORKSPACE_DIR = workdir / "generated_projects"
+    codding_pro.CONFIG_DIR = workdir / ".gpt-engineer"
+    print(f"🧪 Stub models and services installed (work dir: {workdir})")
+    return main.app
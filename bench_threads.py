@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 🧵 Thread-budget benchmark
+# Runs a mix of real models (Word summarizer, SEO flan-t5, phi-1_5, ...) concurrently and reports
+# aggregate throughput as concurrency grows, for three CPU setups:
+#   oversubscribed – every worker uses all cores (torch's default)
+#   budgeted       – each worker gets cpu_count / workers intra-op threads
+#   pinned         – budgeted, and each worker is pinned to its own cores
+# Each (setup, concurrency) point runs in a fresh process because thread pools are sized per process.
+#
+#   python bench_threads.py --concurrency 1,2,4,8 --requests 24 --out threads.json
+
+CASES = {
+    "word.summarizer": ("Remote work lets teams hire anywhere, cut commuting and focus on output. " * 12,
+                        {"max_length": 120, "min_length": 40, "do_sample": False}),
+    "seo.generator": ("Write a 150 character SEO meta description for: running shoes", {"max_length": 80}),
+    "excel.phi": ("Generate only Excel formula for: total of price and quantity\nFormula:", {"max_length": 60}),
+    "ppt.qa": ("Create a detailed and structured slide presentation on: product launch", {"max_length": 128}),
+}
+
+
+def setups(cpus: int, workers: int) -> dict:
+    budget = str(max(1, cpus // workers))
+    return {
+        "oversubscribed": {"INFERENCE_THREADS": str(cpus), "INFERENCE_PIN_CORES": "0"},
+        "budgeted": {"INFERENCE_THREADS": budget, "INFERENCE_PIN_CORES": "0"},
+        "pinned": {"INFERENCE_THREADS": budget, "INFERENCE_PIN_CORES": "1"},
+    }
+
+
+def run_point(models: list, concurrency: int, requests_total: int) -> dict:
+    # Child process: load the models once, then fire a shuffled heterogeneous request mix.
+    import bench_stubs
+    bench_stubs.ensure_optional_modules()
+    import EXCEL, word, ppt, smart_marketing_ai  # noqa: F401 – registers the models
+    from model_registry import get_model
+    from inference import generate_text
+
+    for name in models:
+        get_model(name)
+        generate_text(name, CASES[name][0], **CASES[name][1])  # warm-up
+
+    rng = random.Random(0)
+    mix = [models[i % len(models)] for i in range(requests_total)]
+    rng.shuffle(mix)
+    lock = threading.Lock()
+    latencies = {name: [] for name in models}
+
+    def worker():
+        while True:
+            with lock:
+                if not mix:
+                    return
+                name = mix.pop()
+            prompt, params = CASES[name]
+            t0 = time.perf_counter()
+            generate_text(name, prompt, **params)
+            with lock:
+                latencies[name].append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    seconds = time.perf_counter() - started
+    return {
+        "seconds": round(seconds, 2),
+        "req_per_s": round(requests_total / seconds, 3),
+        "median_ms": {name: round(sorted(v)[len(v) // 2] * 1000, 1) for name, v in latencies.items() if v},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate throughput vs concurrency with per-worker thread budgets")
+    parser.add_argument("--models", default="word.summarizer,seo.generator,excel.phi")
+    parser.add_argument("--concurrency", default="1,2,4,8")
+    parser.add_argument("--requests", type=int, default=24, help="Requests per point")
+    parser.add_argument("--setups", default="oversubscribed,budgeted,pinned")
+    parser.add_argument("--out", default="", help="Write JSON results to this file")
+    parser.add_argument("--point", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    models = [m.strip() for m in args.models.split(",") if m.strip()]
+
+    if args.point:
+        print(json.dumps(run_point(models, int(args.concurrency), args.requests)))
+        return
+
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    wanted = [s.strip() for s in args.setups.split(",") if s.strip()]
+    results = {}
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        for setup, env in setups(cpus, concurrency).items():
+            if setup not in wanted:
+                continue
+            child_env = {**os.environ, **env, "INFERENCE_WORKERS": str(concurrency), "BATCHING_ENABLED": "0",
+                         "GEN_CACHE_ENABLED": "0", "SINGLEFLIGHT_ENABLED": "0", "TIERING_ENABLED": "0",
+                         "PREWARM_MODELS": ""}
+            proc = subprocess.run([sys.executable, __file__, "--point", "--models", ",".join(models),
+                                   "--concurrency", str(concurrency), "--requests", str(args.requests)],
+                                  env=child_env, capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(proc.stderr[-2000:])
+                raise SystemExit(f"❌ {setup} @ {concurrency} failed")
+            point = json.loads(proc.stdout.strip().splitlines()[-1])
+            point["threads_per_worker"] = int(env["INFERENCE_THREADS"])
+            results.setdefault(setup, {})[str(concurrency)] = point
+            print(f"🧵 {setup:<14} concurrency {concurrency:>2}  {point['req_per_s']:>7.3f} req/s  "
+                  f"({point['threads_per_worker']} threads/worker)")
+
+    output = json.dumps({"meta": {"python": platform.python_version(), "platform": platform.platform(), "cpus": cpus,
+                                  "models": models, "requests_per_point": args.requests}, "results": results}, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+        print(f"✅ Results written to {args.out}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,9 @@ from typing import Optional
 import tkinter as tk
 from tkinter import simpledialog, messagebox
 from fastapi import APIRouter
+from starlette.concurrency import run_in_threadpool
+from jobs import submit_job, job_response, report_progress
+from tracing import traced
 
 router = APIRouter()
 
@@ -31,6 +34,7 @@ TEMPLATES = {
 SUPPORTED_MODELS = ["mistral", "codellama", "deepseek-coder"]
 
 # ✅ Ensure Setup
+@traced()
 def ensure_setup():
     if not GPT_ENGINEER_DIR.exists():
         subprocess.run(["git", "clone", "https://github.com/AntonOsika/gpt-engineer.git", str(GPT_ENGINEER_DIR)], check=True)
@@ -46,6 +50,7 @@ def setup_model_config(model_name: str):
     config_file.write_text(f"model: {model_name}\nprovider: ollama\nmodel_endpoint: http://localhost:11434\n", encoding="utf-8")
 
 # ✅ Translate
+@traced()
 def translate_to_english(text: str) -> str:
     try:
         return GoogleTranslator(source='auto', target='en').translate(text)
@@ -58,6 +63,7 @@ def write_prompt(text: str, path: Path):
     (path / "prompt").write_text(text, encoding="utf-8")
 
 # ✅ GPT Engineer Runner with Overwrite Support
+@traced()
 def run_gpt_engineer(prompt: str, model: str, overwrite: bool = False) -> str:
     app_path = WORKSPACE_DIR / prompt.replace(" ", "_").lower()
     if app_path.exists() and not overwrite:
@@ -185,10 +191,10 @@ def home():
 
 @app.post("/generate-ui")
 async def generate_ui(task: str = Form(...), model: str = Form(...), template: str = Form(""), overwrite: str = Form("false")):
-    ensure_setup()
+    await run_in_threadpool(ensure_setup)
     setup_model_config(model)
-    prompt = TEMPLATES.get(template.lower()) if template.lower() in TEMPLATES else translate_to_english(task)
-    result = run_gpt_engineer(prompt, model, overwrite.lower() == "true")
+    prompt = TEMPLATES.get(template.lower()) if template.lower() in TEMPLATES else await run_in_threadpool(translate_to_english, task)
+    result = await run_in_threadpool(run_gpt_engineer, prompt, model, overwrite.lower() == "true")
     return {"status": "done", "message": result}
 
 # ✅ Swagger API Support
@@ -200,12 +206,19 @@ class CodeRequest(BaseModel):
 
 @app.post("/generate", tags=["Swagger"])
 def generate_code(data: CodeRequest):
+    report_progress(0.0, "setup")
     ensure_setup()
     setup_model_config(data.model)
+    report_progress(0.1, "prompt")
     prompt = TEMPLATES.get(data.template.lower()) if data.template and data.template.lower() in TEMPLATES else translate_to_english(data.task)
+    report_progress(0.15, "gpt-engineer")
     result = run_gpt_engineer(prompt, data.model, data.overwrite)
     return {"status": "done", "message": result}
 
+@app.post("/generate/job", tags=["Swagger"])
+def generate_code_job(data: CodeRequest):
+    return job_response(submit_job("code", generate_code, data))
+
 # ✅ CLI Mode
 def cli_mode():
     print("📦 GPT Engineer CLI")
@@ -0,0 +1,334 @@
+import re
+
+# 🧩 Grammar-constrained decoding
+# formula_status() checks, character by character, whether text is a complete Excel formula,
+# a valid prefix of one, or invalid. FormulaLogitsProcessor only lets the model pick tokens that
+# keep the output a valid prefix, and forces EOS as soon as the formula is complete and the
+# model stops extending it. Selected with generate_text(..., constraint="excel-formula").
+
+COMPLETE, PARTIAL, INVALID = "complete", "partial", "invalid"
+
+FUNCTIONS = {
+    "ABS", "AND", "AVERAGE", "AVERAGEIF", "AVERAGEIFS", "CEILING", "CHOOSE", "CONCAT", "CONCATENATE",
+    "COUNT", "COUNTA", "COUNTBLANK", "COUNTIF", "COUNTIFS", "DATE", "DATEDIF", "DAY", "DAYS", "EDATE",
+    "EOMONTH", "EXACT", "FILTER", "FIND", "FLOOR", "HLOOKUP", "HOUR", "IF", "IFERROR", "IFNA", "IFS",
+    "INDEX", "INT", "ISBLANK", "ISERROR", "ISNUMBER", "ISTEXT", "LARGE", "LEFT", "LEN", "LN", "LOG",
+    "LOG10", "LOOKUP", "LOWER", "MATCH", "MAX", "MAXIFS", "MEDIAN", "MID", "MIN", "MINIFS", "MINUTE",
+    "MOD", "MONTH", "NETWORKDAYS", "NOT", "NOW", "OR", "PMT", "POWER", "PRODUCT", "PROPER", "RANK",
+    "REPLACE", "REPT", "RIGHT", "ROUND", "ROUNDDOWN", "ROUNDUP", "SEARCH", "SMALL", "SORT", "SQRT",
+    "STDEV", "SUBSTITUTE", "SUBTOTAL", "SUM", "SUMIF", "SUMIFS", "SUMPRODUCT", "SWITCH", "TEXT",
+    "TEXTJOIN", "TODAY", "TRIM", "TRUNC", "UNIQUE", "UPPER", "VALUE", "VAR", "VLOOKUP", "WEEKDAY",
+    "WORKDAY", "XLOOKUP", "XOR", "YEAR",
+}
+BOOLEANS = {"TRUE", "FALSE"}
+OPERATORS = ("<>", "<=", ">=", "+", "-", "*", "/", "^", "&", "=", "<", ">")
+
+# References: A1 cells, B:B whole columns and 1:1 whole rows, optionally Sheet1! / 'My Sheet'! qualified.
+_CELL = re.compile(r"\$?[A-Za-z]{1,3}\$?[1-9][0-9]{0,6}")
+_COLUMN = re.compile(r"\$?[A-Za-z]{1,3}")
+_ROW = re.compile(r"\$?[1-9][0-9]{0,6}")
+_SHEET = re.compile(r"[A-Za-z_][A-Za-z0-9_.]*")
+_PREFIXES = {
+    "cell": re.compile(r"\$?([A-Za-z]{1,3}(\$?([1-9][0-9]{0,6})?)?)?"),
+    "column": re.compile(r"\$?[A-Za-z]{0,3}"),
+    "row": re.compile(r"\$?([1-9][0-9]{0,6})?"),
+}
+_CELL_PREFIX = _PREFIXES["cell"]
+
+
+class _Partial(Exception):
+    pass
+
+
+class _Invalid(Exception):
+    pass
+
+
+def _could_extend(word: str) -> bool:
+    upper = word.upper()
+    return (_CELL_PREFIX.fullmatch(word) is not None or _SHEET.fullmatch(word) is not None
+            or any(name.startswith(upper) for name in FUNCTIONS | BOOLEANS))
+
+
+def _ref_kind(word: str):
+    for kind, pattern in (("cell", _CELL), ("column", _COLUMN), ("row", _ROW)):
+        if pattern.fullmatch(word):
+            return kind
+    return None
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.s = text
+        self.i = 0
+
+    def peek(self):
+        return self.s[self.i] if self.i < len(self.s) else None
+
+    def spaces(self):
+        # At most one space between tokens, so the model can't pad forever.
+        if self.peek() == " ":
+            self.i += 1
+        if self.peek() == " ":
+            raise _Invalid()
+
+    def expect(self, ch: str):
+        if self.peek() is None:
+            raise _Partial()
+        if self.peek() != ch:
+            raise _Invalid()
+        self.i += 1
+
+    def formula(self):
+        self.spaces()
+        self.expect("=")
+        self.expr()
+        self.spaces()
+        if self.peek() is not None:
+            raise _Invalid()
+
+    def expr(self):
+        self.term()
+        while True:
+            self.spaces()
+            if self.peek() is None:
+                return
+            op = next((o for o in OPERATORS if self.s.startswith(o, self.i)), None)
+            if op is None:
+                return
+            self.i += len(op)
+            self.term()
+
+    def term(self):
+        self.spaces()
+        while self.peek() in ("+", "-"):
+            self.i += 1
+        self.spaces()
+        c = self.peek()
+        if c is None:
+            raise _Partial()
+        if c.isdigit() or c == ".":
+            start = self.i
+            self.number()
+            if self.peek() == ":" and _ROW.fullmatch(self.s[start:self.i]):
+                self.i += 1
+                self.range_end("row")
+        elif c == '"':
+            self.string()
+        elif c == "'":
+            self.quoted_sheet()
+        elif c == "(":
+            self.i += 1
+            self.expr()
+            self.spaces()
+            self.expect(")")
+        elif c == "$" or c.isalpha():
+            self.name()
+        else:
+            raise _Invalid()
+        if self.peek() == "%":
+            self.i += 1
+
+    def number(self):
+        start = self.i
+        while self.peek() is not None and (self.peek().isdigit() or self.peek() == "."):
+            self.i += 1
+        if self.s[start:self.i].count(".") > 1 or self.s[start:self.i] == ".":
+            if self.peek() is None and self.s[start:self.i] == ".":
+                raise _Partial()
+            raise _Invalid()
+        if self.peek() in ("E", "e"):
+            self.i += 1
+            if self.peek() in ("+", "-"):
+                self.i += 1
+            if self.peek() is None:
+                raise _Partial()
+            if not self.peek().isdigit():
+                raise _Invalid()
+            while self.peek() is not None and self.peek().isdigit():
+                self.i += 1
+
+    def string(self):
+        self.i += 1
+        while True:
+            c = self.peek()
+            if c is None:
+                raise _Partial()
+            self.i += 1
+            if c == '"':
+                if self.peek() == '"':
+                    self.i += 1
+                    continue
+                return
+
+    def word(self) -> str:
+        start = self.i
+        while self.peek() is not None and (self.peek().isalnum() or self.peek() in "._$"):
+            self.i += 1
+        return self.s[start:self.i]
+
+    def name(self):
+        word = self.word()
+        if self.peek() == "(":
+            if word.upper() not in FUNCTIONS:
+                raise _Invalid()
+            self.i += 1
+            self.args()
+            return
+        if self.peek() == "!":
+            if not _SHEET.fullmatch(word):
+                raise _Invalid()
+            self.i += 1
+            self.qualified()
+            return
+        if self.peek() is None:
+            if _CELL.fullmatch(word) or word.upper() in BOOLEANS:
+                return
+            raise _Partial() if _could_extend(word) else _Invalid()
+        if word.upper() in BOOLEANS:
+            return
+        self.reference(word)
+
+    def quoted_sheet(self):
+        self.i += 1
+        while True:
+            c = self.peek()
+            if c is None:
+                raise _Partial()
+            self.i += 1
+            if c == "'":
+                if self.peek() == "'":
+                    self.i += 1
+                    continue
+                break
+        self.expect("!")
+        self.qualified()
+
+    def qualified(self):
+        # The reference after Sheet1! – no functions or booleans here.
+        c = self.peek()
+        if c is None:
+            raise _Partial()
+        if c != "$" and not c.isalnum():
+            raise _Invalid()
+        word = self.word()
+        if self.peek() is None:
+            if _CELL.fullmatch(word):
+                return
+            raise _Partial() if any(p.fullmatch(word) for p in _PREFIXES.values()) else _Invalid()
+        self.reference(word)
+
+    def reference(self, word: str):
+        # A cell on its own, or the start of a cell:cell / column:column / row:row range.
+        kind = _ref_kind(word)
+        if kind and self.peek() == ":":
+            self.i += 1
+            self.range_end(kind)
+            return
+        if kind != "cell":
+            raise _Invalid()
+
+    def range_end(self, kind: str):
+        end = self.word()
+        if _ref_kind(end) == kind:
+            return
+        if self.peek() is None and _PREFIXES[kind].fullmatch(end):
+            raise _Partial()
+        raise _Invalid()
+
+    def args(self):
+        self.spaces()
+        if self.peek() == ")":
+            self.i += 1
+            return
+        while True:
+            self.expr()
+            self.spaces()
+            c = self.peek()
+            if c is None:
+                raise _Partial()
+            self.i += 1
+            if c == ")":
+                return
+            if c != ",":
+                raise _Invalid()
+
+
+def formula_status(text: str) -> str:
+    try:
+        _Parser(text).formula()
+        return COMPLETE
+    except _Partial:
+        return PARTIAL
+    except _Invalid:
+        return INVALID
+
+
+def is_valid_formula(text: str) -> bool:
+    return formula_status(text.strip()) == COMPLETE
+
+
+# === Decoding ===
+_PIECES = {}
+
+
+def _piece(tokenizer, token_id: int) -> str:
+    pieces = _PIECES.setdefault(id(tokenizer), {})
+    if token_id not in pieces:
+        pieces[token_id] = tokenizer.decode([token_id], skip_special_tokens=True)
+    return pieces[token_id]
+
+
+class FormulaLogitsProcessor:
+    # Follows transformers' LogitsProcessor protocol: (input_ids, scores) -> scores.
+    def __init__(self, tokenizer, top_k: int = 32, max_scan: int = 2048):
+        self.tokenizer = tokenizer
+        self.eos = getattr(tokenizer, "eos_token_id", None)
+        self.top_k = top_k
+        self.max_scan = max_scan
+        self.start = None
+
+    def allowed(self, text: str, ranked: list) -> list:
+        status = formula_status(text)
+        if status == COMPLETE:
+            best = ranked[0]
+            if best == self.eos or formula_status(text + _piece(self.tokenizer, best)) == INVALID:
+                return [self.eos]
+        allowed = []
+        for token_id in ranked:
+            if token_id == self.eos:
+                continue
+            if formula_status(text + _piece(self.tokenizer, token_id)) != INVALID:
+                allowed.append(token_id)
+                if len(allowed) >= self.top_k:
+                    break
+        if status == COMPLETE or not allowed:
+            allowed.append(self.eos)
+        return allowed
+
+    def __call__(self, input_ids, scores):
+        import torch
+
+        if self.start is None:
+            self.start = input_ids.shape[1]
+        masked = torch.full_like(scores, float("-inf"))
+        k = min(self.max_scan, scores.shape[-1])
+        for row in range(input_ids.shape[0]):
+            text = self.tokenizer.decode(input_ids[row, self.start:], skip_special_tokens=True)
+            ranked = torch.topk(scores[row], k).indices.tolist()
+            allowed = torch.tensor(self.allowed(text, ranked), device=scores.device)
+            masked[row, allowed] = scores[row, allowed]
+        return masked
+
+
+CONSTRAINTS = {"excel-formula": FormulaLogitsProcessor}
+
+
+def generate_kwargs(constraint: str, tokenizer) -> dict:
+    # Fresh processor per call: it tracks where the prompt ends.
+    from transformers import LogitsProcessorList
+
+    if constraint not in CONSTRAINTS:
+        raise ValueError(f"Unknown decoding constraint: {constraint}")
+    return {"logits_processor": LogitsProcessorList([CONSTRAINTS[constraint](tokenizer)]),
+            "eos_token_id": getattr(tokenizer, "eos_token_id", None)}
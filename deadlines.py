@@ -0,0 +1,102 @@
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from metrics import Counter
+
+# ⏱️ Request deadlines
+# A deadline is an absolute time.monotonic() carried in a contextvar. AdmissionMiddleware starts
+# one when a request arrives (the route's ENDPOINT_DEADLINES entry, or the client's
+# X-Deadline-Ms if sooner; neither is set by default), and generate_text turns what is left of
+# it into max_time for model.generate, so decoding stops and returns its partial output instead
+# of running past the point where the client has given up. Code can tighten it for a block with `with deadline(seconds):`, or per
+# call with generate_text(..., deadline=seconds).
+#
+# ENDPOINT_DEADLINES: "/seo/seo=120,/blog/generate=300" (seconds).
+
+DEADLINE_FLOOR_S = float(os.getenv("DEADLINE_FLOOR_S", "0.2"))
+
+# Opt-in per route: a request-wide deadline is shared by every sequential model call the route
+# makes (SEO analysis runs about six on CPU), so pick values that cover the whole flow.
+ENDPOINT_DEADLINES = {k.strip().rstrip("/"): float(v) for k, v in
+                      (p.split("=", 1) for p in os.getenv("ENDPOINT_DEADLINES", "").split(",") if "=" in p)}
+
+DEADLINE_TRUNCATED = Counter("generation_deadline_truncated_total", "Generations cut short by their deadline, by model")
+
+_deadline = contextvars.ContextVar("deadline", default=None)
+_truncations = contextvars.ContextVar("deadline_truncations", default=None)
+
+
+def current():
+    return _deadline.get()
+
+
+def remaining():
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def sooner(seconds=None):
+    # The current deadline, tightened to `seconds` from now when given.
+    at = _deadline.get()
+    if seconds is None:
+        return at
+    mine = time.monotonic() + float(seconds)
+    return mine if at is None else min(at, mine)
+
+
+def pop_call_deadline(params: dict):
+    # deadline= and max_time= (seconds, either or both) tighten the current deadline for one call.
+    limits = [v for v in (params.pop("deadline", None), params.pop("max_time", None)) if v is not None]
+    return sooner(min(limits) if limits else None)
+
+
+def max_time(at) -> float:
+    # What's left for a model call; never below DEADLINE_FLOOR_S so a late call still returns something.
+    return max(DEADLINE_FLOOR_S, at - time.monotonic())
+
+
+def expired(at) -> bool:
+    return at is not None and time.monotonic() >= at
+
+
+def truncated(model: str):
+    # A generation for `model` may have been cut short; counted, and flagged to watch_truncation().
+    DEADLINE_TRUNCATED.inc(model=model)
+    seen = _truncations.get()
+    if seen is not None:
+        seen.append(model)
+
+
+@contextmanager
+def watch_truncation():
+    # Yields a list that collects the models truncated by their deadline inside the block.
+    seen = []
+    token = _truncations.set(seen)
+    try:
+        yield seen
+    finally:
+        _truncations.reset(token)
+
+
+@contextmanager
+def deadline(seconds):
+    token = _deadline.set(sooner(seconds))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def for_request(path: str, headers: list):
+    # Seconds allowed for this request: the route's setting, or the client's X-Deadline-Ms if sooner.
+    seconds = ENDPOINT_DEADLINES.get(path.rstrip("/"))
+    for name, value in headers:
+        if name == b"x-deadline-ms":
+            try:
+                client = int(value) / 1000
+            except ValueError:
+                break
+            seconds = client if seconds is None else min(seconds, client)
+            break
+    return seconds
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from metrics import GaugeFunc
+
+# 💾 Content-addressed generation cache
+# Keyed by (model, prompt, generation params). A bounded in-memory LRU sits in front of a
+# size-bounded on-disk tier that survives restarts. Only deterministic calls are cached.
+
+GEN_CACHE_ENABLED = os.getenv("GEN_CACHE_ENABLED", "1") == "1"
+GEN_CACHE_MEMORY_ENTRIES = int(os.getenv("GEN_CACHE_MEMORY_ENTRIES", "1024"))
+GEN_CACHE_DIR = Path(os.getenv("GEN_CACHE_DIR", Path(tempfile.gettempdir()) / "job_helper_gen_cache"))
+GEN_CACHE_DISK_MB = float(os.getenv("GEN_CACHE_DISK_MB", "256"))
+
+# Params that only bound how long a call may run; they never change a completed output.
+NON_KEY_PARAMS = {"max_time", "deadline"}
+
+
+def cache_key(model: tuple, prompt: str, params: dict) -> str:
+    keyed = {k: v for k, v in params.items() if k not in NON_KEY_PARAMS}
+    payload = json.dumps([list(model), prompt, keyed], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cacheable(params: dict) -> bool:
+    return GEN_CACHE_ENABLED and not params.get("do_sample")
+
+
+class GenerationCache:
+    def __init__(self, directory: Path = GEN_CACHE_DIR, memory_entries: int = GEN_CACHE_MEMORY_ENTRIES,
+                 disk_mb: float = GEN_CACHE_DISK_MB):
+        self.directory = Path(directory)
+        self.memory_entries = memory_entries
+        self.disk_bytes_limit = int(disk_mb * 1024 * 1024)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0,
+                         "memory_evictions": 0, "disk_evictions": 0}
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _remember(self, key: str, value: str):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.counters["memory_evictions"] += 1
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return self._memory[key]
+
+        path = self._path(key)
+        try:
+            value = json.loads(path.read_text(encoding="utf-8"))["text"]
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.counters["misses"] += 1
+            return None
+
+        with self._lock:
+            self.counters["disk_hits"] += 1
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: str):
+        with self._lock:
+            self._remember(key, value)
+            self.counters["stores"] += 1
+        if self.disk_bytes_limit <= 0:
+            return
+        path = self._path(key)
+        data = json.dumps({"text": value}, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            self.disk_usage()  # first scan happens before the write, so the new file isn't counted twice
+        try:
+            old = path.stat().st_size
+        except OSError:
+            old = 0
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"⚠️ Generation cache write failed: {e}")
+            return
+        with self._lock:
+            self._disk_bytes += len(data) - old
+            over = self._disk_bytes > self.disk_bytes_limit
+        if over:
+            self._evict_disk()
+
+    def disk_usage(self) -> int:
+        if self._disk_bytes is None:
+            self._disk_bytes = sum(p.stat().st_size for p in self.directory.glob("*/*.json")) if self.directory.exists() else 0
+        return self._disk_bytes
+
+    def _evict_disk(self):
+        # Least recently used first: hits refresh mtime.
+        files = sorted(((p.stat().st_mtime, p.stat().st_size, p) for p in self.directory.glob("*/*.json")),
+                       key=lambda f: f[0])
+        total = sum(size for _, size, _ in files)
+        target = self.disk_bytes_limit * 0.9
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            with self._lock:
+                self.counters["disk_evictions"] += 1
+        with self._lock:
+            self._disk_bytes = total
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+            memory_entries = len(self._memory)
+        lookups = counters["memory_hits"] + counters["disk_hits"] + counters["misses"]
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        return {
+            **counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": memory_entries,
+            "disk_bytes": self.disk_usage(),
+        }
+
+
+generation_cache = GenerationCache()
+
+GaugeFunc("generation_cache_events_total", "Generation cache lookups and evictions by outcome",
+          lambda: {(("outcome", k),): v for k, v in generation_cache.stats().items()
+                   if k not in ("hit_rate", "memory_entries", "disk_bytes")}, kind="counter")
+GaugeFunc("generation_cache_hit_rate", "Generation cache hit rate since start", lambda: generation_cache.stats()["hit_rate"])
+GaugeFunc("generation_cache_disk_bytes", "Bytes used by the on-disk generation cache", lambda: generation_cache.stats()["disk_bytes"])
@@ -0,0 +1,350 @@
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from model_registry import get_model, model_key
+from generation_cache import generation_cache, cache_key, cacheable
+import batching
+import prefix_cache
+import constrained
+import singleflight
+import admission
+import deadlines
+import tiering
+import scheduler
+from tracing import span, record_span
+from metrics import GaugeFunc, MODEL_INFERENCE_SECONDS, MODEL_GENERATED_TOKENS, MODEL_TOKENS_PER_SECOND
+
+# ⚙️ Bounded inference executor
+# All pipeline / model.generate calls run on a small worker pool so CPU-heavy generation
+# never runs on the event loop. Module code calls generate_text() (or run_sync() for other
+# pipelines); async handlers wrap their work in await run_inference(), which moves it off
+# the loop while the model calls inside it still queue for the bounded pool.
+# Each worker gets its own torch intra-op thread budget (and optionally its own cores), so
+# concurrent models don't each spawn one thread per core and oversubscribe the CPU.
+# Waiting calls are dispatched by the fair-share scheduler (scheduler.py), not FIFO.
+
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+INFERENCE_QUEUE_DEPTH = int(os.getenv("INFERENCE_QUEUE_DEPTH", "32"))
+INFERENCE_RETRY_AFTER = os.getenv("INFERENCE_RETRY_AFTER", "5")
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "0")) or max(1, (os.cpu_count() or 1) // INFERENCE_WORKERS)
+INFERENCE_INTEROP_THREADS = int(os.getenv("INFERENCE_INTEROP_THREADS", "1"))
+INFERENCE_PIN_CORES = os.getenv("INFERENCE_PIN_CORES", "0") == "1"
+INFERENCE_SCHEDULER = os.getenv("INFERENCE_SCHEDULER", "fair")  # "fifo" for the plain thread pool
+# Per-model intra-op threads, e.g. "excel.phi=4,word.summarizer=1".
+MODEL_THREADS = {k.strip(): int(v) for k, v in
+                 (p.split("=", 1) for p in os.getenv("MODEL_THREADS", "").split(",") if "=" in p)}
+
+_executor = None
+_pending = 0
+_lock = threading.Lock()
+_worker = threading.local()
+_slots = itertools.count()
+
+
+class InferenceQueueFull(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=503, detail="Inference queue is full, please retry shortly",
+                         headers={"Retry-After": INFERENCE_RETRY_AFTER})
+
+
+# === CPU thread budget ===
+def _worker_cores(slot: int) -> list:
+    available = sorted(os.sched_getaffinity(0))
+    per_worker = max(1, len(available) // INFERENCE_WORKERS)
+    start = (slot * per_worker) % len(available)
+    return available[start:start + per_worker]
+
+
+def set_thread_budget(threads: int):
+    # torch.set_num_threads applies to the calling thread's OpenMP parallel regions.
+    if getattr(_worker, "threads", None) == threads:
+        return
+    import torch
+    torch.set_num_threads(threads)
+    _worker.threads = threads
+
+
+def thread_budget(name: str) -> int:
+    return MODEL_THREADS.get(name, INFERENCE_THREADS)
+
+
+def _budgeted(name: str, fn):
+    def call(*args, **kwargs):
+        set_thread_budget(thread_budget(name))
+        return fn(*args, **kwargs)
+    return call
+
+
+def _init_worker():
+    _worker.active = True
+    _worker.slot = next(_slots)
+    if INFERENCE_PIN_CORES and hasattr(os, "sched_setaffinity"):
+        _worker.cores = _worker_cores(_worker.slot)
+        os.sched_setaffinity(0, _worker.cores)  # pid 0 = this thread
+    set_thread_budget(INFERENCE_THREADS)
+
+
+def in_worker() -> bool:
+    return getattr(_worker, "active", False)
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            try:
+                import torch
+                torch.set_num_interop_threads(INFERENCE_INTEROP_THREADS)
+            except (ImportError, RuntimeError):
+                pass  # inter-op pool already started; it can only be sized once per process
+            pool = scheduler.FairScheduler if INFERENCE_SCHEDULER == "fair" else ThreadPoolExecutor
+            _executor = pool(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference", initializer=_init_worker)
+        return _executor
+
+
+def _reserve():
+    global _pending
+    with _lock:
+        if _pending - INFERENCE_WORKERS >= INFERENCE_QUEUE_DEPTH:
+            raise InferenceQueueFull()
+        _pending += 1
+
+
+def _release(_future=None):
+    global _pending
+    with _lock:
+        _pending -= 1
+
+
+def submit(fn, *args, **kwargs):
+    _reserve()
+    ctx = contextvars.copy_context()
+    queued_at = time.perf_counter()
+
+    def call():
+        started = time.perf_counter()
+        record_span("inference.queue_wait", queued_at, started)
+        tiering.policy.observe(started - queued_at)
+        return fn(*args, **kwargs)
+
+    try:
+        future = get_executor().submit(ctx.run, call)
+    except Exception:
+        _release()
+        raise
+    future.add_done_callback(_release)
+    return admission.track(future)
+
+
+async def run_inference(fn, *args, **kwargs):
+    return await run_in_threadpool(fn, *args, **kwargs)
+
+
+def run_sync(fn, *args, **kwargs):
+    if in_worker():
+        return fn(*args, **kwargs)
+    return submit(fn, *args, **kwargs).result()
+
+
+# === Text generation entry point ===
+BATCHED_TASKS = {"text2text-generation"}
+BATCHING_ENABLED = os.getenv("BATCHING_ENABLED", "1") == "1"
+_inflight = singleflight.group("generate_text")
+
+
+def _output_text(output, task: str) -> str:
+    if isinstance(output, list):
+        output = output[0]
+    return output["summary_text" if task == "summarization" else "generated_text"]
+
+
+def _record(name: str, pipe, texts: list, seconds: float, prompt: str = ""):
+    # Only the generated continuation counts: text-generation returns prompt + continuation by default.
+    if prompt:
+        texts = [t[len(prompt):] if t.startswith(prompt) else t for t in texts]
+    tokens = sum(len(pipe.tokenizer(t, add_special_tokens=False)["input_ids"]) for t in texts) if pipe.tokenizer else 0
+    MODEL_INFERENCE_SECONDS.observe(seconds, model=name)
+    MODEL_GENERATED_TOKENS.inc(tokens, model=name)
+    if seconds > 0 and tokens:
+        MODEL_TOKENS_PER_SECOND.observe(tokens / seconds, model=name)
+
+
+def _time_left(at) -> dict:
+    # Evaluated when the call starts on a worker, so time spent queued counts against the deadline.
+    return {"max_time": deadlines.max_time(at)} if at is not None else {}
+
+
+# === Assisted (speculative) decoding ===
+ASSISTED_DECODING = os.getenv("ASSISTED_DECODING", "0") == "1"
+_ASSISTANTS = {}
+
+
+def register_assistant(name: str, draft: str):
+    # With ASSISTED_DECODING=1, `draft` (a small model with the same tokenizer) proposes a few tokens
+    # at a time and `name` verifies them in one forward pass; greedy output is unchanged.
+    _ASSISTANTS[name] = draft
+
+
+def assistant_kwargs(name: str, params: dict) -> dict:
+    draft = _ASSISTANTS.get(name)
+    if not ASSISTED_DECODING or draft is None or params.get("num_beams", 1) > 1:
+        return {}
+    return {"assistant_model": get_model(draft).model}
+
+
+def _batch_runner(name: str, task: str, params: dict):
+    # Batchers live for the process, so the runner resolves the pipeline per batch instead of
+    # holding one: an evicted model's weights can then actually be freed.
+    def run_batch(prompts, batch_at):
+        started = time.perf_counter()
+        model = get_model(name)
+        with scheduler.classify(tool_of(name), scheduler.cost_of(params)):
+            outputs = run_sync(_budgeted(name, lambda: model(prompts, batch_size=len(prompts), **params,
+                                                             **_time_left(batch_at))))
+        texts = [_output_text(o, task) for o in outputs]
+        _record(name, model, texts, time.perf_counter() - started)
+        return texts
+    return run_batch
+
+
+def _generate(name: str, prompt: str, params: dict, at=None) -> str:
+    pipe = get_model(name)
+    params = dict(params)
+    constraint = params.pop("constraint", None)
+
+    def decoding():
+        kwargs = constrained.generate_kwargs(constraint, pipe.tokenizer) if constraint else {}
+        return {**kwargs, **assistant_kwargs(name, params)}
+
+    if BATCHING_ENABLED and pipe.task in BATCHED_TASKS and not in_worker() and not constraint:
+        key = (name, tuple(sorted(params.items())))
+        batcher = batching.get_batcher(key, _batch_runner(name, pipe.task, params))
+        return admission.track(batcher.submit(prompt, at)).result()
+    prefix = prefix_cache.match_prefix(name, prompt) if pipe.task in prefix_cache.PREFIX_TASKS else None
+    if prefix:
+        started = time.perf_counter()
+        text = run_sync(_budgeted(name, lambda: prefix_cache.generate(pipe, prefix, prompt,
+                                                                      {**params, **decoding(), **_time_left(at)})))
+        if text is not None:
+            _record(name, pipe, [text], time.perf_counter() - started, prompt)
+            return text
+    started = time.perf_counter()
+    output = run_sync(_budgeted(name, lambda: pipe(prompt, **params, **decoding(), **_time_left(at))))
+    text = _output_text(output, pipe.task)
+    _record(name, pipe, [text], time.perf_counter() - started, prompt)
+    return text
+
+
+def _generate_and_store(name: str, prompt: str, params: dict, key, at=None) -> str:
+    text = _generate(name, prompt, params, at)
+    if deadlines.expired(at):
+        # Possibly cut short by max_time: return the partial output, but don't cache it.
+        deadlines.truncated(name)
+    elif key:
+        generation_cache.put(key, text)
+    return text
+
+
+def tool_of(name: str) -> str:
+    return name.split(".", 1)[0]
+
+
+def generate_text(name: str, prompt: str, **params) -> str:
+    # deadline= (seconds) or max_time= tightens the request's deadline for this call.
+    at = deadlines.pop_call_deadline(params)
+    job_class = scheduler.classify(tool_of(name), scheduler.cost_of(params))
+    with span(f"generate {name}", model=name) as attrs, job_class:
+        # Under load a smaller tier may serve the call, but a cached full-size answer still wins.
+        served = tiering.select(name)
+        key = cache_key(model_key(served), prompt, params) if cacheable(params) else None
+        if key:
+            for tier, lookup in {cache_key(model_key(name), prompt, params): name, key: served}.items():
+                cached = generation_cache.get(lookup)
+                if cached is not None:
+                    # Report the tier whose answer was actually returned.
+                    tiering.report(name, tier)
+                    attrs["tier"], attrs["cache"] = tiering.tier_label(tier), "hit"
+                    return cached
+        tiering.report(name, served)
+        attrs["tier"], attrs["cache"] = tiering.tier_label(served), "miss"
+        # Identical deterministic calls already running are joined instead of generated again.
+        # Not from a worker thread: a follower there could hold the worker its leader is waiting for.
+        # Nor with a deadline: the key ignores it, so a follower could be handed output truncated
+        # by someone else's deadline, and its own context would never learn it was truncated.
+        if params.get("do_sample") or in_worker() or at is not None:
+            return _generate_and_store(served, prompt, params, key, at)
+        flight_key = cache_key(model_key(served), " ".join(prompt.split()), params)
+        return _inflight.do(flight_key, _generate_and_store, served, prompt, params, key, at)
+
+
+# === Token streaming ===
+def stream_text(name: str, prompt: str, **params):
+    # Yields decoded text chunks as model.generate produces them; the full text is cached at the end.
+    from transformers import TextIteratorStreamer
+
+    at = deadlines.pop_call_deadline(params)
+    params = {k: v for k, v in params.items() if k != "return_full_text"}
+    requested, name = name, tiering.select(name)
+    tiering.report(requested, name)
+    key = cache_key(model_key(name), prompt, params) if cacheable(params) else None
+    cached = generation_cache.get(key) if key else None
+    if cached is not None:
+        yield cached
+        return
+
+    pipe = get_model(name)
+    streamer = TextIteratorStreamer(pipe.tokenizer, skip_prompt=True, skip_special_tokens=True)
+    inputs = pipe.tokenizer(prompt, return_tensors="pt").to(pipe.model.device)
+    with scheduler.classify(tool_of(name), scheduler.cost_of(params)):
+        future = submit(_budgeted(name, lambda: pipe.model.generate(**inputs, streamer=streamer, **params,
+                                                                    **assistant_kwargs(name, params),
+                                                                    **_time_left(at))))
+    future.add_done_callback(lambda f: streamer.end() if f.cancelled() or f.exception() else None)
+
+    parts = []
+    started = time.perf_counter()
+    for chunk in streamer:
+        if chunk:
+            parts.append(chunk)
+            yield chunk
+    future.result()
+    _record(name, pipe, ["".join(parts)], time.perf_counter() - started)
+    if deadlines.expired(at):
+        deadlines.truncated(name)
+    elif key:
+        generation_cache.put(key, "".join(parts))
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def queue_stats() -> dict:
+    with _lock:
+        pending = _pending
+    return {
+        "workers": INFERENCE_WORKERS,
+        "running": min(pending, INFERENCE_WORKERS),
+        "queued": max(0, pending - INFERENCE_WORKERS),
+        "max_queue_depth": INFERENCE_QUEUE_DEPTH,
+        "threads_per_worker": INFERENCE_THREADS,
+        "model_threads": MODEL_THREADS,
+        "pinned_cores": INFERENCE_PIN_CORES,
+        "scheduler": INFERENCE_SCHEDULER,
+        "classes": _executor.stats() if isinstance(_executor, scheduler.FairScheduler) else {},
+        "batching": batching.batch_stats(),
+    }
+
+
+GaugeFunc("inference_queue_depth", "Model calls waiting for an inference worker", lambda: queue_stats()["queued"])
+GaugeFunc("inference_running", "Model calls running on inference workers", lambda: queue_stats()["running"])
+GaugeFunc("inference_class_queued", "Model calls waiting for an inference worker, by tool class",
+          lambda: {(("tool", k),): v["queued"] for k, v in queue_stats()["classes"].items()})
+GaugeFunc("batcher_waiting", "Prompts waiting in micro-batchers",
+          lambda: {(("batcher", k),): v["waiting"] for k, v in batching.batch_stats().items()})
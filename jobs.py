@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from fastapi import APIRouter
+from fastapi.responses import FileResponse, JSONResponse
+from tracing import start_trace
+
+# ⏳ Asynchronous job subsystem
+# Long-running generation (blog + PDF, SEO analysis, gpt-engineer, Bark TTS) is submitted as a
+# job: the request returns a job id at once and clients poll /jobs/{id} for status/progress,
+# then download the artifact. Jobs report progress and check for cancellation via report_progress().
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+
+router = APIRouter()
+
+
+class JobCancelled(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str = "queued"
+    progress: float = 0.0
+    stage: str = ""
+    result: object = None
+    artifact: Path = None
+    error: str = ""
+    created: float = field(default_factory=time.time)
+    started: float = None
+    finished: float = None
+    cancel_requested: bool = False
+    future: object = None
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": round(self.progress, 3),
+            "stage": self.stage,
+            "result": self.result,
+            "artifact": self.artifact.name if self.artifact else None,
+            "download_url": f"/jobs/{self.id}/download" if self.artifact and self.status == "done" else None,
+            "error": self.error or None,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+_jobs = {}
+_lock = threading.Lock()
+_executor = None
+_current = threading.local()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+        return _executor
+
+
+def report_progress(fraction: float, stage: str = ""):
+    # No-op outside a job; inside one it updates progress and raises if the job was cancelled.
+    job = getattr(_current, "job", None)
+    if job is None:
+        return
+    if job.cancel_requested:
+        raise JobCancelled(job.id)
+    job.progress = max(job.progress, min(fraction, 1.0))
+    if stage:
+        job.stage = stage
+
+
+def _run(job: Job, fn, args, kwargs):
+    _current.job = job
+    job.status = "running"
+    job.started = time.time()
+    try:
+        with start_trace(f"job {job.kind}") as trace:
+            trace.attrs["job_id"] = job.id
+            result = fn(*args, **kwargs)
+        if isinstance(result, Path):
+            job.artifact = result
+        else:
+            job.result = result
+        job.status = "done"
+        job.progress = 1.0
+    except JobCancelled:
+        job.status = "cancelled"
+    except Exception as e:
+        job.status = "failed"
+        job.error = str(e)
+    finally:
+        job.finished = time.time()
+        _current.job = None
+
+
+def _prune():
+    cutoff = time.time() - JOB_RETENTION_SECONDS
+    with _lock:
+        for job_id in [j.id for j in _jobs.values() if j.finished and j.finished < cutoff]:
+            del _jobs[job_id]
+
+
+def submit_job(kind: str, fn, *args, **kwargs) -> Job:
+    _prune()
+    job = Job(id=uuid.uuid4().hex, kind=kind)
+    with _lock:
+        _jobs[job.id] = job
+    job.future = _get_executor().submit(_run, job, fn, args, kwargs)
+    return job
+
+
+def get_job(job_id: str):
+    with _lock:
+        return _jobs.get(job_id)
+
+
+def cancel_job(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        return None
+    if job.status in ("queued", "running"):
+        job.cancel_requested = True
+        if job.future.cancel():
+            job.status = "cancelled"
+            job.finished = time.time()
+    return job
+
+
+def job_response(job: Job) -> JSONResponse:
+    return JSONResponse({"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}, status_code=202)
+
+
+# === Routes ===
+@router.get("")
+def list_jobs():
+    with _lock:
+        return [j.to_dict() for j in _jobs.values()]
+
+
+@router.get("/{job_id}")
+def job_status(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        return JSONResponse({"error": "Job not found"}, 404)
+    return job.to_dict()
+
+
+@router.get("/{job_id}/download")
+def job_download(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        return JSONResponse({"error": "Job not found"}, 404)
+    if job.status != "done" or job.artifact is None or not job.artifact.exists():
+        return JSONResponse({"error": "No artifact available", "status": job.status}, 409)
+    return FileResponse(job.artifact, filename=job.artifact.name)
+
+
+@router.delete("/{job_id}")
+def job_cancel(job_id: str):
+    job = cancel_job(job_id)
+    if job is None:
+        return JSONResponse({"error": "Job not found"}, 404)
+    return job.to_dict()
@@ -1,14 +1,31 @@
 from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
-from EXCEL import router as excel_router
-from word import router as word_router
-from ppt import router as ppt_router
-from smart_marketing_ai import router as seo_router
-from smart_pdf_blog_ai import router as blog_router
-from tts_generator import router as tts_router
-from codding_pro import router as code_router
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
+from EXCEL import router as excel_router, app as excel_app
+from word import router as word_router, app as word_app
+from ppt import router as ppt_router, app as ppt_app
+from smart_marketing_ai import router as seo_router, app as seo_app
+from smart_pdf_blog_ai import router as blog_router, app as blog_app
+from tts_generator import router as tts_router, app as tts_app
+from codding_pro import router as code_router, app as code_app
+import model_registry
+import inference
+from jobs import router as jobs_router
+from generation_cache import generation_cache
+from semantic_cache import semantic_stats
+from prefix_cache import prefix_stats
+from singleflight import singleflight_stats
+from artifact_store import artifacts
+import metrics
+import tracing
+import process_memory
+import admission
+import tiering
 
 app = FastAPI(title="🚀 All-in-One AI Workspace")
+app.add_middleware(admission.AdmissionMiddleware)  # innermost: shed requests still show up in metrics and traces
+app.add_middleware(tiering.TierHeaderMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(tracing.TracingMiddleware)
 
 # Register all routers
 app.include_router(excel_router, prefix="/excel")
@@ -18,6 +35,74 @@ app.include_router(seo_router, prefix="/seo")
 app.include_router(blog_router, prefix="/blog")
 app.include_router(tts_router, prefix="/tts")
 app.include_router(code_router, prefix="/code")
+app.include_router(jobs_router, prefix="/jobs")
+
+# Serve each tool's full app under its prefix (e.g. /ppt/generate/, /word/generate-docx-ui)
+app.mount("/excel", excel_app)
+app.mount("/word", word_app)
+app.mount("/ppt", ppt_app)
+app.mount("/seo", seo_app)
+app.mount("/blog", blog_app)
+app.mount("/tts", tts_app)
+app.mount("/code", code_app)
+
+# Models load lazily; optionally prewarm a list in the background (PREWARM_MODELS)
+@app.on_event("startup")
+def prewarm_models():
+    model_registry.start_prewarm()
+
+@app.get("/ready")
+def ready():
+    status = model_registry.readiness()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/models/memory")
+def models_memory():
+    return model_registry.memory_report()
+
+@app.get("/models/tiers")
+def models_tiers():
+    return tiering.tier_stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/inference/queue")
+def inference_queue():
+    return inference.queue_stats()
+
+@app.get("/admission/stats")
+def admission_stats():
+    return admission.admission_stats()
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {"generation": generation_cache.stats(), "semantic": semantic_stats(), "prefix": prefix_stats(),
+            "singleflight": singleflight_stats()}
+
+@app.get("/artifacts/stats")
+def artifact_stats():
+    return artifacts.stats()
+
+@app.get("/memory")
+def process_memory_report():
+    return process_memory.memory_report()
+
+@app.get("/models/events")
+def models_events(limit: int = 100):
+    return model_registry.model_events(limit)
+
+@app.get("/traces/slow")
+def slow_traces(min_ms: float = 0, name: str = "", limit: int = 50):
+    return tracing.slow_traces(min_ms, name, limit)
+
+@app.get("/traces/{trace_id}")
+def trace_detail(trace_id: str, format: str = "json"):
+    trace = tracing.find_trace(trace_id)
+    if trace is None:
+        return JSONResponse({"error": "Trace not found"}, 404)
+    return trace.to_chrome() if format == "chrome" else trace.to_dict()
 
 # Main dashboard
 @app.get("/", response_class=HTMLResponse)
@@ -0,0 +1,160 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# 📊 Minimal Prometheus-style metrics
+# Counters, histograms and callback gauges rendered in the text exposition format at /metrics.
+# Instrumentation lives in the module functions themselves (routes, models, queues, caches).
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_REGISTRY = []
+_lock = threading.Lock()
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        _REGISTRY.append(self)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with _lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._values = {}
+        _REGISTRY.append(self)
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with _lock:
+            entry = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def timed(self, **labels):
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def samples(self):
+        out = []
+        with _lock:
+            for key, (counts, total, count) in self._values.items():
+                for bound, c in zip(self.buckets, counts):
+                    out.append((f"{self.name}_bucket", key, c, (("le", str(bound)),)))
+                out.append((f"{self.name}_bucket", key, count, (("le", "+Inf"),)))
+                out.append((f"{self.name}_sum", key, total))
+                out.append((f"{self.name}_count", key, count))
+        return out
+
+
+class GaugeFunc:
+    # Value(s) read at scrape time: fn() returns a number or {labels dict as tuple: number}.
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, fn, kind: str = "gauge"):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        self.kind = kind
+        _REGISTRY.append(self)
+
+    def samples(self):
+        try:
+            value = self.fn()
+        except Exception:
+            return []
+        if isinstance(value, dict):
+            return [(self.name, _label_key(dict(k)), v) for k, v in value.items()]
+        return [(self.name, (), value)]
+
+
+def render() -> str:
+    lines = []
+    for metric in list(_REGISTRY):
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for sample in metric.samples():
+            name, key, value = sample[:3]
+            extra = sample[3] if len(sample) > 3 else ()
+            lines.append(f"{name}{_format_labels(key, extra)} {float(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# === Shared instruments ===
+HTTP_REQUEST_SECONDS = Histogram("http_request_duration_seconds", "HTTP request latency by route")
+MODEL_INFERENCE_SECONDS = Histogram("model_inference_seconds", "Model call latency by model")
+MODEL_GENERATED_TOKENS = Counter("model_generated_tokens_total", "Tokens generated by model")
+MODEL_TOKENS_PER_SECOND = Histogram("model_tokens_per_second", "Generation throughput per call by model",
+                                    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000))
+EXTERNAL_CALL_SECONDS = Histogram("external_call_seconds", "Latency of external API lookups by service")
+
+
+class MetricsMiddleware:
+    # Pure ASGI middleware so the matched route template (including mounted tool apps) is visible.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None)
+            label = f"{scope.get('root_path', '')}{route}" if route else "unmatched"
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, route=label,
+                                         method=scope.get("method", ""), status=status["code"])
@@ -0,0 +1,425 @@
+import gc
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from metrics import GaugeFunc
+
+# 🧠 Central model registry
+# Every module declares its models by name; weights are only loaded on first use.
+# Names registered with register_pipeline() share one instance per (model id, task, dtype),
+# and pipelines for different tasks on the same checkpoint share one copy of the weights.
+# With MODEL_MEMORY_BUDGET_MB set, least recently used models are unloaded to stay in budget
+# and re-loaded on their next use. Precision (fp32 / bf16 / fp16 / dynamic int8) is chosen
+# per model here via MODEL_PRECISION and MODEL_PRECISION_OVERRIDES.
+
+PREWARM_MODELS = [m.strip() for m in os.getenv("PREWARM_MODELS", "").split(",") if m.strip()]
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))
+# Default precision for every transformers model, and per-name overrides: "excel.phi=int8,blog.writer=bf16".
+MODEL_PRECISION = os.getenv("MODEL_PRECISION", "").strip()
+MODEL_PRECISION_OVERRIDES = {k.strip(): v.strip() for k, v in
+                             (p.split("=", 1) for p in os.getenv("MODEL_PRECISION_OVERRIDES", "").split(",") if "=" in p)}
+
+TASK_MODEL_CLASSES = {
+    "text2text-generation": "AutoModelForSeq2SeqLM",
+    "summarization": "AutoModelForSeq2SeqLM",
+    "text-generation": "AutoModelForCausalLM",
+    "text-classification": "AutoModelForSequenceClassification",
+}
+
+# int8 loads fp32 weights, then dynamically quantizes the Linear layers (CPU only).
+DTYPES = {"fp32": "float32", "bf16": "bfloat16", "fp16": "float16", "int8": "float32"}
+
+
+@dataclass
+class ModelSpec:
+    name: str
+    key: tuple
+    loader: object = None
+    task: str = ""
+    model_id: str = ""
+    dtype: str = "fp32"
+    fallback: str = ""
+    device: str = ""
+    load_kwargs: dict = field(default_factory=dict)
+
+
+_SPECS = {}
+_INSTANCES = {}
+_WEIGHTS = {}
+_ERRORS = {}
+_LOADING = set()
+_KEY_LOCKS = {}
+_LAST_USED = {}
+_EVENTS = deque(maxlen=500)
+_LOCK = threading.Lock()
+_prewarm_thread = None
+
+
+class ModelLoadError(RuntimeError):
+    pass
+
+
+def _add_spec(spec: ModelSpec, prewarm: bool):
+    with _LOCK:
+        _SPECS[spec.name] = spec
+        _KEY_LOCKS.setdefault(spec.key, threading.Lock())
+        if prewarm and spec.name not in PREWARM_MODELS:
+            PREWARM_MODELS.append(spec.name)
+
+
+def register_model(name: str, loader, prewarm: bool = False):
+    _add_spec(ModelSpec(name=name, key=("custom", name), loader=loader), prewarm)
+
+
+def precision_for(name: str, task: str, dtype: str) -> str:
+    if task not in TASK_MODEL_CLASSES:
+        return dtype
+    precision = MODEL_PRECISION_OVERRIDES.get(name) or MODEL_PRECISION or dtype
+    if precision not in DTYPES:
+        print(f"⚠️ Unknown precision '{precision}' for {name}, using {dtype}")
+        return dtype
+    return precision
+
+
+def register_pipeline(name: str, task: str, model_id: str, dtype: str = "fp32", fallback: str = "",
+                      device: str = "", prewarm: bool = False, **load_kwargs):
+    dtype = precision_for(name, task, dtype)
+    spec = ModelSpec(name=name, key=(model_id, task, dtype), task=task, model_id=model_id,
+                     dtype=dtype, fallback=fallback, device=device, load_kwargs=load_kwargs)
+    _add_spec(spec, prewarm)
+
+
+def registered_models() -> list:
+    return [name for name in _SPECS if "@" not in name and "~" not in name]
+
+
+def precision_variant(name: str, precision: str) -> str:
+    # Registers "<name>@<precision>": same checkpoint and task, loaded at another precision (benchmarks).
+    spec = _SPECS[name]
+    variant = f"{name}@{precision}"
+    if variant not in _SPECS:
+        _add_spec(ModelSpec(name=variant, key=(spec.model_id, spec.task, precision), task=spec.task,
+                            model_id=spec.model_id, dtype=precision, device=spec.device,
+                            load_kwargs=dict(spec.load_kwargs)), prewarm=False)
+    return variant
+
+
+def tier_variant(name: str, model_id: str) -> str:
+    # Registers "<name>~<size>": same task and precision on a smaller checkpoint (load-aware tiering).
+    spec = _SPECS[name]
+    variant = f"{name}~{model_id.rsplit('-', 1)[-1]}"
+    if variant not in _SPECS:
+        _add_spec(ModelSpec(name=variant, key=(model_id, spec.task, spec.dtype), loader=spec.loader, task=spec.task,
+                            model_id=model_id, dtype=spec.dtype, device=spec.device,
+                            load_kwargs=dict(spec.load_kwargs)), prewarm=False)
+    return variant
+
+
+def model_spec(name: str) -> ModelSpec:
+    return _SPECS[name]
+
+
+def override_loaders(make_loader):
+    # Build every registered model with make_loader(spec)() instead of its weights (benchmarks use stubs).
+    with _LOCK:
+        for spec in _SPECS.values():
+            spec.loader = make_loader(spec)
+            _INSTANCES.pop(spec.key, None)
+            _LAST_USED.pop(spec.key, None)
+        _WEIGHTS.clear()
+
+
+# === Loading ===
+def _weights_key(spec: ModelSpec) -> tuple:
+    return spec.model_id, spec.dtype, TASK_MODEL_CLASSES.get(spec.task, "pipeline")
+
+
+def _load_weights(spec: ModelSpec):
+    import torch
+    import transformers
+    from transformers import AutoTokenizer
+
+    model_cls = getattr(transformers, TASK_MODEL_CLASSES[spec.task])
+    kwargs = dict(spec.load_kwargs)
+    if spec.dtype in DTYPES:
+        kwargs["torch_dtype"] = getattr(torch, DTYPES[spec.dtype])
+    tokenizer = AutoTokenizer.from_pretrained(spec.model_id, **spec.load_kwargs)
+    model = model_cls.from_pretrained(spec.model_id, **kwargs)
+    if spec.device:
+        model.to(spec.device)
+    model.eval()
+    if spec.dtype == "int8":
+        model = _quantize_int8(model, spec)
+    return tokenizer, model
+
+
+def _quantize_int8(model, spec: ModelSpec):
+    import torch
+
+    if model.device.type != "cpu":
+        print(f"⚠️ int8 dynamic quantization is CPU-only; keeping {spec.name} in fp32 on {model.device}")
+        return model
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _get_weights(spec: ModelSpec):
+    wkey = _weights_key(spec)
+    with _LOCK:
+        lock = _KEY_LOCKS.setdefault(("weights",) + wkey, threading.Lock())
+    with lock:
+        if wkey not in _WEIGHTS:
+            _WEIGHTS[wkey] = _load_weights(spec)
+        return _WEIGHTS[wkey]
+
+
+def _build(spec: ModelSpec):
+    if spec.loader is not None:
+        return spec.loader()
+    if spec.task not in TASK_MODEL_CLASSES:
+        from transformers import pipeline
+        return pipeline(spec.task, model=spec.model_id, **spec.load_kwargs)
+    from transformers import pipeline
+    tokenizer, model = _get_weights(spec)
+    return pipeline(spec.task, model=model, tokenizer=tokenizer, device=model.device)
+
+
+def get_model(name: str):
+    spec = _SPECS.get(name)
+    if spec is None:
+        raise KeyError(f"Unknown model: {name}")
+    instance = _INSTANCES.get(spec.key)
+    if instance is not None:
+        _LAST_USED[spec.key] = time.monotonic()
+        return instance
+
+    with _KEY_LOCKS[spec.key]:
+        instance = _INSTANCES.get(spec.key)
+        if instance is not None:
+            return instance
+        with _LOCK:
+            _LOADING.add(name)
+        print(f"🔄 Loading model ({name} → {spec.model_id or 'custom'})...")
+        started = time.perf_counter()
+        try:
+            instance = _build(spec)
+        except Exception as e:
+            if not spec.fallback:
+                with _LOCK:
+                    _ERRORS[name] = str(e)
+                raise ModelLoadError(f"Failed to load {name}: {e}") from e
+            print(f"⚠️ {name} failed to load, falling back to {spec.fallback}: {e}")
+            instance = get_model(spec.fallback)
+        finally:
+            with _LOCK:
+                _LOADING.discard(name)
+        elapsed = time.perf_counter() - started
+        with _LOCK:
+            _INSTANCES[spec.key] = instance
+            _LAST_USED[spec.key] = time.monotonic()
+            _ERRORS.pop(name, None)
+        _record_event("load", name, model_nbytes(instance), seconds=round(elapsed, 3))
+        print(f"✅ Model ready ({name}) in {elapsed:.1f}s")
+        _enforce_budget(protect=instance)
+        return instance
+
+
+def try_get_model(name: str):
+    try:
+        return get_model(name)
+    except ModelLoadError as e:
+        print(f"⚠️ {e}")
+        return None
+
+
+def model_key(name: str) -> tuple:
+    return _SPECS[name].key
+
+
+def is_loaded(name: str) -> bool:
+    spec = _SPECS.get(name)
+    return spec is not None and spec.key in _INSTANCES
+
+
+def unload_model(name: str):
+    spec = _SPECS.get(name)
+    if spec is None:
+        return
+    with _LOCK:
+        _INSTANCES.pop(spec.key, None)
+        _LAST_USED.pop(spec.key, None)
+        if spec.loader is None:
+            wkey = _weights_key(spec)
+            still_used = any(_weights_key(s) == wkey and s.key in _INSTANCES
+                             for s in _SPECS.values() if s.loader is None)
+            if not still_used:
+                _WEIGHTS.pop(wkey, None)
+
+
+class LazyModel:
+    # Stand-in for a module-level model object; resolves through the registry on use.
+    def __init__(self, name: str):
+        self.name = name
+
+    def __call__(self, *args, **kwargs):
+        return get_model(self.name)(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(get_model(self.name), attr)
+
+
+def lazy_model(name: str) -> LazyModel:
+    return LazyModel(name)
+
+
+# === Prewarm ===
+def prewarm(names=None):
+    for name in names if names is not None else list(PREWARM_MODELS):
+        try_get_model(name)
+
+
+def start_prewarm(names=None):
+    global _prewarm_thread
+    if _prewarm_thread is None or not _prewarm_thread.is_alive():
+        _prewarm_thread = threading.Thread(target=prewarm, args=(names,), name="model-prewarm", daemon=True)
+        _prewarm_thread.start()
+    return _prewarm_thread
+
+
+# === Memory budget / LRU eviction ===
+def _record_event(event: str, name: str, nbytes: int, **extra):
+    _EVENTS.append({"event": event, "name": name, "bytes": nbytes, "at": time.time(), **extra})
+
+
+def _resident_groups():
+    # Names whose instances share one torch module are evicted together; otherwise nothing is freed.
+    with _LOCK:
+        resident = [(name, s.key, _INSTANCES[s.key]) for name, s in _SPECS.items() if s.key in _INSTANCES]
+        last_used = dict(_LAST_USED)
+    groups = {}
+    for name, key, instance in resident:
+        module = _torch_module(instance)
+        group = groups.setdefault(id(module), {"module": module, "names": [], "last_used": 0.0})
+        group["names"].append(name)
+        group["last_used"] = max(group["last_used"], last_used.get(key, 0.0))
+    for group in groups.values():
+        group["bytes"] = model_nbytes(group["module"])
+    return list(groups.values())
+
+
+def evict(names):
+    for name in names:
+        unload_model(name)
+    gc.collect()
+
+
+def _enforce_budget(protect=None):
+    if MODEL_MEMORY_BUDGET_MB <= 0:
+        return
+    budget = MODEL_MEMORY_BUDGET_MB * 1024 * 1024
+    protected = id(_torch_module(protect)) if protect is not None else None
+    groups = _resident_groups()
+    total = sum(g["bytes"] for g in groups)
+    for group in sorted(groups, key=lambda g: g["last_used"]):
+        if total <= budget:
+            break
+        if id(group["module"]) == protected:
+            continue
+        evict(group["names"])
+        total -= group["bytes"]
+        for name in group["names"]:
+            _record_event("evict", name, group["bytes"])
+        print(f"♻️ Evicted {', '.join(group['names'])} ({group['bytes'] / 1e6:.0f} MB) to stay within model budget")
+    if total > budget:
+        print(f"⚠️ Resident models use {total / 1e6:.0f} MB, above budget of {MODEL_MEMORY_BUDGET_MB:.0f} MB")
+
+
+def model_events(limit: int = 100) -> list:
+    return list(_EVENTS)[-limit:]
+
+
+# === Memory accounting ===
+def _torch_module(obj):
+    if isinstance(obj, tuple):
+        return next((o for o in obj if hasattr(o, "parameters")), None)
+    if hasattr(obj, "parameters"):
+        return obj
+    return getattr(obj, "model", None)
+
+
+def model_nbytes(obj) -> int:
+    module = _torch_module(obj)
+    if module is None:
+        return 0
+    tensors = list(module.parameters()) + list(module.buffers())
+    if hasattr(module, "modules"):
+        # Dynamically quantized Linear layers keep their int8 weights in packed params, not parameters().
+        for sub in module.modules():
+            packed = getattr(sub, "_packed_params", None)
+            if packed is not None and hasattr(packed, "_weight_bias"):
+                tensors.extend(t for t in packed._weight_bias() if t is not None)
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def memory_report() -> dict:
+    # "unshared_bytes" is what the resident names would cost if every module held its own copy.
+    with _LOCK:
+        resident = [(name, _INSTANCES[s.key]) for name, s in _SPECS.items() if s.key in _INSTANCES]
+
+    groups = {}
+    for name, instance in resident:
+        module = _torch_module(instance)
+        entry = groups.setdefault(id(module), {"module": module, "used_by": []})
+        entry["used_by"].append(name)
+
+    with _LOCK:
+        last_used = {name: _LAST_USED.get(s.key) for name, s in _SPECS.items()}
+    now = time.monotonic()
+
+    weights_report = []
+    resident_bytes = 0
+    unshared_bytes = 0
+    for entry in groups.values():
+        nbytes = model_nbytes(entry["module"])
+        resident_bytes += nbytes
+        unshared_bytes += nbytes * len(entry["used_by"])
+        config = getattr(entry["module"], "config", None)
+        idle = [now - last_used[n] for n in entry["used_by"] if last_used.get(n) is not None]
+        weights_report.append({
+            "model_id": getattr(config, "name_or_path", "custom"),
+            "precision": sorted({_SPECS[n].dtype for n in entry["used_by"] if _SPECS[n].loader is None}),
+            "bytes": nbytes,
+            "used_by": sorted(entry["used_by"]),
+            "idle_seconds": round(min(idle), 1) if idle else None,
+        })
+
+    return {
+        "budget_bytes": int(MODEL_MEMORY_BUDGET_MB * 1024 * 1024),
+        "resident_bytes": resident_bytes,
+        "unshared_bytes": unshared_bytes,
+        "saved_bytes": unshared_bytes - resident_bytes,
+        "weights": weights_report,
+    }
+
+
+# === Readiness ===
+def readiness() -> dict:
+    with _LOCK:
+        resident = sorted(n for n, s in _SPECS.items() if s.key in _INSTANCES)
+        loading = sorted(_LOADING)
+        failed = dict(_ERRORS)
+        registered = sorted(_SPECS)
+    pending = [m for m in PREWARM_MODELS if m not in resident and m not in failed]
+    return {
+        "ready": not pending,
+        "resident": resident,
+        "loading": loading,
+        "pending_prewarm": pending,
+        "failed": failed,
+        "registered": registered,
+    }
+
+
+GaugeFunc("model_resident_bytes", "Resident model weight bytes",
+          lambda: {(("model_id", w["model_id"]),): w["bytes"] for w in memory_report()["weights"]})
@@ -1,12 +1,9 @@
 import os
-import tempfile
 import uuid
 import subprocess
-from pathlib import Path
 from fastapi import FastAPI, UploadFile, File, Form, Request
-from fastapi.responses import FileResponse, JSONResponse, HTMLResponse
+from fastapi.responses import FileResponse, JSONResponse, HTMLResponse, StreamingResponse
 from pydantic import BaseModel
-from transformers import pipeline
 from pptx import Presentation
 import tkinter as tk
 from tkinter import filedialog, simpledialog, messagebox
@@ -14,6 +11,10 @@ import comtypes.client  # MS PowerPoint Live Detection
 # ppt.py
 
 from fastapi import APIRouter
+from model_registry import register_pipeline
+from inference import run_inference, generate_text, stream_text, sse_event
+from artifact_store import artifacts
+from tracing import traced
 
 router = APIRouter()
 
@@ -22,18 +23,21 @@ def test_ppt():
     return {"message": "PPT route is working!"}
 
 app = FastAPI(title="📽️ Smart PPT AI Assistant")
-TEMP_DIR = Path(tempfile.gettempdir())
 SUPPORTED_FORMATS = ["pptx"]
 
-qa_model = pipeline("text2text-generation", model="google/flan-t5-small")
+register_pipeline("ppt.qa", "text2text-generation", "google/flan-t5-small")
 
 # 🧠 Prompt-based content processing
+def content_prompt(topic: str, style="structured") -> str:
+    return f"Create a detailed and {style} slide presentation on: {topic}"
+
+@traced()
 def generate_content(topic: str, style="structured") -> str:
-    prompt = f"Create a detailed and {style} slide presentation on: {topic}"
-    return qa_model(prompt, max_length=1024)[0]["generated_text"]
+    return generate_text("ppt.qa", content_prompt(topic, style), max_length=1024)
 
 # 📊 Create PPT from content
-def create_ppt(content: str, output_path: str) -> str:
+@traced()
+def create_ppt(content: str, output_path: str = None, prefix: str = "generated_"):
     ppt = Presentation()
     for section in content.strip().split("\n\n"):
         slide = ppt.slides.add_slide(ppt.slide_layouts[1])
@@ -42,6 +46,8 @@ def create_ppt(content: str, output_path: str) -> str:
             slide.shapes.title.text = lines[0]
             if len(lines) > 1:
                 slide.placeholders[1].text = "\n".join(lines[1:])
+    if output_path is None:
+        return artifacts.save(".pptx", ppt.save, prefix=prefix)
     ppt.save(output_path)
     return output_path
 
@@ -72,9 +78,8 @@ async def main_page():
 async def interactive_generate(request: Request):
     form = await request.form()
     topic = form.get("topic")
-    result = generate_content(topic)
-    output_path = TEMP_DIR / f"{uuid.uuid4()}.pptx"
-    create_ppt(result, output_path)
+    result = await run_inference(generate_content, topic)
+    output_path = await run_inference(create_ppt, result, prefix="interactive_")
     return FileResponse(output_path, filename="interactive_slides.pptx")
 
 @app.post("/upload/")
@@ -83,15 +88,13 @@ async def upload_ppt(file: UploadFile = File(...), task: str = Form("Summarize i
     if ext not in SUPPORTED_FORMATS:
         return JSONResponse(content={"error": "Unsupported format"}, status_code=400)
 
-    file_path = TEMP_DIR / f"{uuid.uuid4()}.pptx"
-    with open(file_path, "wb") as f:
-        f.write(await file.read())
+    data = await file.read()
+    file_path = artifacts.save(".pptx", lambda p: p.write_bytes(data), prefix="upload_")
 
     prs = Presentation(file_path)
     content = "\n".join([shape.text for slide in prs.slides for shape in slide.shapes if hasattr(shape, "text")])
-    result = qa_model(f"{task}:\n{content}", max_length=512)[0]["generated_text"]
-    output_path = TEMP_DIR / f"processed_{uuid.uuid4()}.pptx"
-    create_ppt(result, output_path)
+    result = await run_inference(generate_text, "ppt.qa", f"{task}:\n{content}", max_length=512)
+    output_path = await run_inference(create_ppt, result, prefix="processed_")
     return FileResponse(output_path, filename="processed_slides.pptx")
 
 @app.post("/process-open-ppt/")
@@ -102,18 +105,37 @@ async def process_open_ppt(task: str = Form("Summarize this presentation")):
 
     prs = Presentation(path)
     content = "\n".join([shape.text for slide in prs.slides for shape in slide.shapes if hasattr(shape, "text")])
-    result = qa_model(f"{task}:\n{content}", max_length=512)[0]["generated_text"]
-    output_path = TEMP_DIR / f"auto_processed_{uuid.uuid4()}.pptx"
-    create_ppt(result, output_path)
+    result = await run_inference(generate_text, "ppt.qa", f"{task}:\n{content}", max_length=512)
+    output_path = await run_inference(create_ppt, result, prefix="auto_processed_")
     return FileResponse(output_path, filename=output_path.name)
 
 @app.post("/generate/")
 async def generate_from_topic(topic: str = Form(...)):
-    content = generate_content(topic)
-    output_path = TEMP_DIR / f"generated_{uuid.uuid4()}.pptx"
-    create_ppt(content, output_path)
+    content = await run_inference(generate_content, topic)
+    output_path = await run_inference(create_ppt, content)
     return FileResponse(output_path, filename="generated_output.pptx")
 
+# 📡 Streaming generation (Server-Sent Events)
+@app.post("/generate/stream")
+async def generate_from_topic_stream(request: Request, topic: str = Form(...)):
+    def events():
+        parts = []
+        for chunk in stream_text("ppt.qa", content_prompt(topic), max_length=1024):
+            parts.append(chunk)
+            yield sse_event("token", chunk)
+        output_path = create_ppt("".join(parts))
+        download = str(request.url_for("download_ppt", name=output_path.name))
+        yield sse_event("done", {"file": output_path.name, "download": download})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/download/{name}")
+def download_ppt(name: str):
+    path = artifacts.get(name)
+    if path is None or path.suffix != ".pptx":
+        return JSONResponse({"error": "Not Found"}, 404)
+    return FileResponse(path, filename=path.name)
+
 # 🖥️ CLI Mode
 def cli_runner():
     import argparse
@@ -133,7 +155,7 @@ def cli_runner():
     if file and file.endswith(".pptx"):
         prs = Presentation(file)
         content = "\n".join([shape.text for slide in prs.slides for shape in slide.shapes if hasattr(shape, "text")])
-        result = qa_model(f"{args.task}:\n{content}", max_length=512)[0]["generated_text"]
+        result = generate_text("ppt.qa", f"{args.task}:\n{content}", max_length=512)
         output = create_ppt(result, "cli_processed_output.pptx")
         print(f"✅ Done: {output}")
     else:
@@ -0,0 +1,95 @@
+import copy
+import os
+import threading
+import weakref
+from metrics import GaugeFunc
+
+# 🧷 Prompt-prefix KV cache for causal LMs
+# Modules register the fixed template text their prompts start with. For text-generation models
+# the template's past key/values are computed once per loaded model, and each call only runs the
+# instruction tokens through the model before decoding. Encoder-decoder (T5) models are not
+# covered: their encoder attends in both directions, so a prefix's encoder states change with
+# the text that follows it and cannot be reused.
+
+PREFIX_CACHE_ENABLED = os.getenv("PREFIX_CACHE_ENABLED", "1") == "1"
+PREFIX_TASKS = {"text-generation"}
+
+_PREFIXES = {}
+_ENTRIES = {}
+_lock = threading.Lock()
+counters = {"hits": 0, "builds": 0, "fallbacks": 0}
+
+
+def register_prefix(name: str, *prefixes: str):
+    with _lock:
+        _PREFIXES.setdefault(name, set()).update(p for p in prefixes if p)
+
+
+def match_prefix(name: str, prompt: str):
+    if not PREFIX_CACHE_ENABLED:
+        return None
+    matches = [p for p in _PREFIXES.get(name, ()) if prompt.startswith(p) and len(prompt) > len(p)]
+    return max(matches, key=len) if matches else None
+
+
+class PrefixEntry:
+    def __init__(self, pipe, prefix: str):
+        import torch
+
+        self.model = weakref.ref(pipe.model)  # don't keep evicted weights alive
+        self.disabled = False
+        self.ids = pipe.tokenizer(prefix, return_tensors="pt")["input_ids"].to(pipe.model.device)
+        with torch.no_grad():
+            self.past = pipe.model(input_ids=self.ids, use_cache=True).past_key_values
+
+
+def _entry(pipe, prefix: str):
+    key = (id(pipe.model), prefix)
+    with _lock:
+        entry = _ENTRIES.get(key)
+        if entry is None or entry.model() is not pipe.model:
+            for stale in [k for k, e in _ENTRIES.items() if e.model() is None]:
+                del _ENTRIES[stale]
+            entry = _ENTRIES[key] = PrefixEntry(pipe, prefix)
+            counters["builds"] += 1
+    return entry
+
+
+def generate(pipe, prefix: str, prompt: str, params: dict):
+    # Returns the pipeline-equivalent text, or None when the prefix can't be reused for this prompt.
+    import torch
+
+    params = dict(params)
+    return_full_text = params.pop("return_full_text", True)
+    entry = _entry(pipe, prefix)
+    ids = pipe.tokenizer(prompt, return_tensors="pt")["input_ids"].to(pipe.model.device)
+    n = entry.ids.shape[1]
+    if entry.disabled or ids.shape[1] <= n or not torch.equal(ids[:, :n], entry.ids):
+        counters["fallbacks"] += 1
+        return None
+
+    pad = pipe.tokenizer.pad_token_id
+    params.setdefault("pad_token_id", pad if pad is not None else pipe.tokenizer.eos_token_id)
+    try:
+        with torch.no_grad():
+            output = pipe.model.generate(input_ids=ids, attention_mask=torch.ones_like(ids),
+                                         past_key_values=copy.deepcopy(entry.past), **params)
+    except Exception as e:
+        # e.g. a transformers version without cache continuation: stop trying for this prefix.
+        print(f"⚠️ Prefix KV cache disabled for '{prefix}': {e}")
+        entry.disabled = True
+        counters["fallbacks"] += 1
+        return None
+
+    counters["hits"] += 1
+    text = pipe.tokenizer.decode(output[0, ids.shape[1]:], skip_special_tokens=True)
+    return prompt + text if return_full_text else text
+
+
+def prefix_stats() -> dict:
+    with _lock:
+        return {**counters, "prefixes": {name: sorted(p) for name, p in _PREFIXES.items()}, "cached": len(_ENTRIES)}
+
+
+GaugeFunc("prefix_cache_events_total", "Prompt-prefix KV cache reuse, builds and fallbacks",
+          lambda: {(("outcome", k),): v for k, v in counters.items()}, kind="counter")
@@ -0,0 +1,49 @@
+import os
+from pathlib import Path
+
+# 🧮 Per-process memory from /proc/<pid>/smaps_rollup
+# RSS counts shared pages in every process that maps them; PSS splits each shared page between
+# its sharers. Under serve.py the sum of worker PSS stays close to one copy of the weights,
+# while the sum of RSS grows with each worker.
+
+FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty", "Anonymous", "Swap")
+
+
+def smaps_rollup(pid="self") -> dict:
+    try:
+        lines = Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()
+    except OSError:
+        return {}
+    out = {}
+    for line in lines:
+        key, _, rest = line.partition(":")
+        if key in FIELDS:
+            out[key.lower() + "_mb"] = round(int(rest.split()[0]) / 1024, 1)
+    return out
+
+
+def child_pids(pid: int) -> list:
+    try:
+        return [int(p) for p in Path(f"/proc/{pid}/task/{pid}/children").read_text().split()]
+    except OSError:
+        return []
+
+
+def memory_report() -> dict:
+    master = int(os.getenv("SERVE_MASTER_PID", "0"))
+    report = {"pid": os.getpid(), "self": smaps_rollup()}
+    if not master:
+        return report
+
+    workers = {pid: smaps_rollup(pid) for pid in child_pids(master)}
+    report["master"] = {"pid": master, **smaps_rollup(master)}
+    report["workers"] = workers
+    everyone = [report["master"], *workers.values()]
+    report["totals"] = {
+        "processes": len(everyone),
+        "rss_sum_mb": round(sum(p.get("rss_mb", 0) for p in everyone), 1),
+        "pss_sum_mb": round(sum(p.get("pss_mb", 0) for p in everyone), 1),
+        "shared_mb": round(sum(p.get("shared_clean_mb", 0) + p.get("shared_dirty_mb", 0) for p in workers.values()), 1),
+        "private_mb": round(sum(p.get("private_clean_mb", 0) + p.get("private_dirty_mb", 0) for p in workers.values()), 1),
+    }
+    return report
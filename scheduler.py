@@ -0,0 +1,161 @@
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from metrics import Histogram
+
+# ⚖️ Weighted fair scheduling for the inference workers
+# Model calls are tagged with a class (the tool: excel, seo, word, blog, ...) and a cost (the
+# requested max_length / max_new_tokens). Workers don't take calls first-come first-served:
+#   - across classes, stride scheduling: each dispatch charges its class cost / weight and the
+#     class with the lowest charge goes next, so a weight-4 tool gets ~4x the token budget of a
+#     weight-1 tool while both are busy (an idle class doesn't bank credit);
+#   - within a class, the shortest requested generation goes first, aged by
+#     SCHED_AGING_TOKENS_PER_S of credit for every second it has waited;
+#   - any call waiting longer than SCHED_MAX_WAIT_S runs next regardless (oldest first).
+# A 1024-token blog keeps running, but quick SEO titles and Excel formulas no longer queue
+# behind a line of them. Per-class wait times: GET /inference/queue and the
+# inference_class_wait_seconds histogram.
+
+SCHED_WEIGHTS = {"excel": 4, "seo": 4, "semantic": 4, "word": 2, "ppt": 2, "code": 2, "tts": 1, "blog": 1}
+SCHED_WEIGHTS.update({k.strip(): float(v) for k, v in
+                      (p.split("=", 1) for p in os.getenv("SCHED_WEIGHTS", "").split(",") if "=" in p)})
+SCHED_DEFAULT_COST = int(os.getenv("SCHED_DEFAULT_COST", "128"))
+SCHED_AGING_TOKENS_PER_S = float(os.getenv("SCHED_AGING_TOKENS_PER_S", "100"))
+SCHED_MAX_WAIT_S = float(os.getenv("SCHED_MAX_WAIT_S", "30"))
+
+CLASS_WAIT_SECONDS = Histogram("inference_class_wait_seconds", "Time model calls waited for a worker, by tool class")
+
+_job_class = contextvars.ContextVar("sched_class", default=("default", SCHED_DEFAULT_COST))
+
+
+@contextmanager
+def classify(tool: str, cost: int = SCHED_DEFAULT_COST):
+    # Model calls submitted inside this block are scheduled as `tool` with this token cost.
+    token = _job_class.set((tool, max(1, int(cost or SCHED_DEFAULT_COST))))
+    try:
+        yield
+    finally:
+        _job_class.reset(token)
+
+
+def cost_of(params: dict) -> int:
+    return int(params.get("max_new_tokens") or params.get("max_length") or SCHED_DEFAULT_COST)
+
+
+class _Job:
+    __slots__ = ("fn", "args", "kwargs", "future", "cost", "enqueued")
+
+    def __init__(self, fn, args, kwargs, cost):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.cost = cost
+        self.enqueued = time.monotonic()
+
+
+class _Class:
+    def __init__(self, name: str):
+        self.name = name
+        self.weight = SCHED_WEIGHTS.get(name, 1)
+        self.jobs = []
+        self.charge = 0.0
+        self.dispatched = 0
+        self.waits = deque(maxlen=512)
+
+    def stats(self) -> dict:
+        waits = sorted(self.waits)
+        return {
+            "weight": self.weight,
+            "queued": len(self.jobs),
+            "dispatched": self.dispatched,
+            "avg_wait_ms": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+            "p95_wait_ms": round(waits[int(len(waits) * 0.95)] * 1000, 1) if waits else 0.0,
+        }
+
+
+class FairScheduler:
+    # Drop-in for ThreadPoolExecutor.submit(): fixed worker threads, fair-share dispatch order.
+    def __init__(self, max_workers: int, thread_name_prefix: str = "inference", initializer=None):
+        self._classes = {}
+        self._queued = 0
+        self._vtime = 0.0
+        self._shutdown = False
+        self._cond = threading.Condition()
+        self._threads = [threading.Thread(target=self._work, args=(initializer,), name=f"{thread_name_prefix}_{i}",
+                                          daemon=True) for i in range(max_workers)]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        tool, cost = _job_class.get()
+        job = _Job(fn, args, kwargs, cost)
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new calls after shutdown")
+            cls = self._classes.get(tool) or self._classes.setdefault(tool, _Class(tool))
+            if not cls.jobs:
+                cls.charge = max(cls.charge, self._vtime)
+            cls.jobs.append(job)
+            self._queued += 1
+            self._cond.notify()
+        return job.future
+
+    def _next(self):
+        now = time.monotonic()
+        for cls in self._classes.values():
+            live = [j for j in cls.jobs if not j.future.cancelled()]  # dropped by a disconnected client
+            self._queued -= len(cls.jobs) - len(live)
+            cls.jobs = live
+        active = [c for c in self._classes.values() if c.jobs]
+        if not active:
+            return None
+        overdue = [(j, c) for c in active for j in c.jobs if now - j.enqueued >= SCHED_MAX_WAIT_S]
+        if overdue:
+            job, cls = min(overdue, key=lambda jc: jc[0].enqueued)
+        else:
+            cls = min(active, key=lambda c: c.charge)
+            self._vtime = max(self._vtime, cls.charge)
+            job = min(cls.jobs, key=lambda j: j.cost - SCHED_AGING_TOKENS_PER_S * (now - j.enqueued))
+        cls.jobs.remove(job)
+        cls.charge += job.cost / cls.weight
+        cls.dispatched += 1
+        cls.waits.append(now - job.enqueued)
+        self._queued -= 1
+        CLASS_WAIT_SECONDS.observe(now - job.enqueued, tool=cls.name)
+        return job
+
+    def _work(self, initializer):
+        if initializer:
+            initializer()
+        while True:
+            with self._cond:
+                while not self._queued and not self._shutdown:
+                    self._cond.wait()
+                if not self._queued:
+                    return
+                job = self._next()
+            if job is None or not job.future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = job.fn(*job.args, **job.kwargs)
+            except BaseException as e:
+                job.future.set_exception(e)
+            else:
+                job.future.set_result(result)
+
+    def shutdown(self, wait: bool = True):
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        if wait:
+            for t in self._threads:
+                t.join()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {name: cls.stats() for name, cls in self._classes.items()}
@@ -0,0 +1,127 @@
+import functools
+import os
+import re
+import threading
+import time
+import numpy as np
+from model_registry import register_pipeline, get_model
+from inference import run_sync
+from scheduler import classify
+import deadlines
+from metrics import GaugeFunc
+
+# 🧲 Semantic near-duplicate prompt cache (optional)
+# Normalized prompts are embedded with a small local model and kept in one NumPy index per
+# task. A new prompt whose cosine similarity to a cached one is above the threshold gets the
+# cached output instead of a full generation ("sum of sales" ≈ "Sum of Sales column").
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "0") == "1"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "512"))
+SEMANTIC_CACHE_MODEL = os.getenv("SEMANTIC_CACHE_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+register_pipeline("semantic.embedder", "feature-extraction", SEMANTIC_CACHE_MODEL)
+
+
+def normalize_prompt(text: str) -> str:
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def embed(text: str) -> np.ndarray:
+    with classify("semantic", 16):
+        features = np.asarray(run_sync(get_model("semantic.embedder"), text), dtype=np.float32)
+    vector = features.reshape(-1, features.shape[-1]).mean(axis=0)
+    return vector / (np.linalg.norm(vector) or 1.0)
+
+
+class SemanticIndex:
+    def __init__(self, max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.vectors = None
+        self.outputs = []
+        self.prompts = []
+        self.last_used = np.zeros(0)
+        self.counters = {"lookups": 0, "hits": 0, "misses": 0, "evictions": 0}
+
+    def search(self, vector: np.ndarray, threshold: float):
+        self.counters["lookups"] += 1
+        if self.vectors is None or not len(self.outputs):
+            self.counters["misses"] += 1
+            return None
+        scores = self.vectors @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < threshold:
+            self.counters["misses"] += 1
+            return None
+        self.counters["hits"] += 1
+        self.last_used[best] = time.monotonic()
+        return self.outputs[best]
+
+    def add(self, prompt: str, vector: np.ndarray, output):
+        if prompt in self.prompts:
+            return
+        if self.vectors is None:
+            self.vectors = vector[None, :]
+        elif len(self.outputs) >= self.max_entries:
+            # Evict the least recently used entry in place.
+            slot = int(np.argmin(self.last_used))
+            self.vectors[slot] = vector
+            self.outputs[slot] = output
+            self.prompts[slot] = prompt
+            self.last_used[slot] = time.monotonic()
+            self.counters["evictions"] += 1
+            return
+        else:
+            self.vectors = np.vstack([self.vectors, vector[None, :]])
+        self.outputs.append(output)
+        self.prompts.append(prompt)
+        self.last_used = np.append(self.last_used, time.monotonic())
+
+    def stats(self) -> dict:
+        lookups = self.counters["lookups"]
+        return {**self.counters, "entries": len(self.outputs),
+                "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else 0.0}
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def _index(task: str) -> SemanticIndex:
+    if task not in _indexes:
+        _indexes[task] = SemanticIndex()
+    return _indexes[task]
+
+
+def semantic_cached(task: str):
+    # Decorates a function whose first argument is the user's prompt text.
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(prompt: str, *args, **kwargs):
+            if not SEMANTIC_CACHE_ENABLED or args or kwargs:
+                return fn(prompt, *args, **kwargs)
+            normalized = normalize_prompt(prompt)
+            vector = embed(normalized)
+            with _lock:
+                cached = _index(task).search(vector, SEMANTIC_CACHE_THRESHOLD)
+            if cached is not None:
+                return cached
+            with deadlines.watch_truncation() as truncated:
+                output = fn(prompt)
+            # Partial (deadline-truncated) or empty outputs would poison every near-duplicate lookup.
+            if output and not truncated and not deadlines.expired(deadlines.current()):
+                with _lock:
+                    _index(task).add(normalized, vector, output)
+            return output
+        return wrapper
+    return decorator
+
+
+def semantic_stats() -> dict:
+    with _lock:
+        return {task: index.stats() for task, index in _indexes.items()}
+
+
+GaugeFunc("semantic_cache_hit_rate", "Semantic cache hit rate by task",
+          lambda: {(("task", task),): s["hit_rate"] for task, s in semantic_stats().items()})
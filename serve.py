@@ -0,0 +1,129 @@
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+# 🍴 Pre-fork server with shared model weights
+# The master imports the app and loads the SERVE_PRELOAD models once, freezes the GC so it never
+# rewrites the objects' headers, then forks uvicorn workers on one shared listening socket.
+# Weight tensors are only read at inference time, so their pages stay shared copy-on-write:
+# adding workers adds CPU throughput without another copy of the weights. GET /memory shows
+# per-worker RSS/PSS and shared vs private memory.
+#
+#   python serve.py --workers 4 --port 7000
+#
+# SERVE_PRELOAD: comma-separated registry names to load in the master, or "all" (default:
+# PREWARM_MODELS, which may be empty). Models that aren't preloaded still load lazily, once per worker.
+
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", os.getenv("WEB_CONCURRENCY", "2")))
+SERVE_PRELOAD = os.getenv("SERVE_PRELOAD", "")
+
+
+def _split_threads(workers: int):
+    # N processes x INFERENCE_WORKERS threads share the cores (see inference.INFERENCE_THREADS).
+    inference_workers = int(os.getenv("INFERENCE_WORKERS", "2"))
+    os.environ.setdefault("INFERENCE_THREADS", str(max(1, (os.cpu_count() or 1) // (workers * inference_workers))))
+
+
+def preload(spec: str):
+    import model_registry
+
+    if spec == "all":
+        names = model_registry.registered_models()
+    else:
+        names = [n.strip() for n in spec.split(",") if n.strip()] or list(model_registry.PREWARM_MODELS)
+    if not names:
+        print("📦 Nothing to preload; models load lazily in each worker")
+        return
+    started = time.perf_counter()
+    model_registry.prewarm(names)
+    print(f"📦 Preloaded {len(names)} models in the master in {time.perf_counter() - started:.1f}s")
+
+
+def bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def spawn(app, sock: socket.socket, log_level: str) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    code = 0
+    try:
+        import uvicorn
+        uvicorn.Server(uvicorn.Config(app, log_level=log_level)).run(sockets=[sock])
+    except Exception as e:
+        print(f"❌ Worker {os.getpid()} crashed: {e}")
+        code = 1
+    finally:
+        os._exit(code)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork server sharing model weights across workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "7000")))
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS)
+    parser.add_argument("--preload", default=SERVE_PRELOAD, help='Registry names to load in the master, or "all"')
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        import uvicorn
+        print("⚠️ os.fork is unavailable on this platform; serving with a single process")
+        uvicorn.run("main:app", host=args.host, port=args.port)
+        return
+
+    _split_threads(args.workers)
+    os.environ["SERVE_MASTER_PID"] = str(os.getpid())
+    from main import app
+
+    preload(args.preload)
+    gc.collect()
+    gc.freeze()  # keep the GC from writing to (and un-sharing) every preloaded object
+
+    sock = bind(args.host, args.port)
+    children = {spawn(app, sock, args.log_level) for _ in range(args.workers)}
+    print(f"🚀 Serving on {args.host}:{args.port} with {args.workers} workers (master {os.getpid()})")
+
+    stopping = False
+
+    def stop(signum, _frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not stopping:
+            print(f"⚠️ Worker {pid} exited ({status}); starting a replacement")
+            children.add(spawn(app, sock, args.log_level))
+    sock.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
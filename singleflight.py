@@ -0,0 +1,85 @@
+import functools
+import os
+import threading
+from concurrent.futures import CancelledError, Future
+from metrics import Counter
+
+# 🛫 Singleflight request coalescing
+# Concurrent calls with the same key share one in-flight computation: the first caller (the
+# leader) runs it and every caller that arrives before it finishes (followers) gets the same
+# result or exception. Nothing is kept after the call completes, so caching is left to the caches.
+
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "1") == "1"
+
+SINGLEFLIGHT_CALLS = Counter("singleflight_calls_total", "Coalesced calls by group and role (leader/follower)")
+
+
+class SingleFlight:
+    def __init__(self, group: str):
+        self.group = group
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.counters = {"leaders": 0, "followers": 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        if not SINGLEFLIGHT_ENABLED:
+            return fn(*args, **kwargs)
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            self.counters["leaders" if leader else "followers"] += 1
+        SINGLEFLIGHT_CALLS.inc(group=self.group, role="leader" if leader else "follower")
+        if not leader:
+            try:
+                return future.result()
+            except CancelledError:
+                # The leader's client went away and its queued work was cancelled; try again ourselves.
+                return self.do(key, fn, *args, **kwargs)
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+_groups = {}
+
+
+def group(name: str) -> SingleFlight:
+    return _groups.setdefault(name, SingleFlight(name))
+
+
+def normalize(value):
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    return value
+
+
+def singleflight(name: str = ""):
+    # Coalesce calls whose arguments are equal after normalize() (case and whitespace for strings).
+    def decorator(fn):
+        flight = group(name or fn.__name__)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (tuple(normalize(a) for a in args), tuple(sorted((k, normalize(v)) for k, v in kwargs.items())))
+            return flight.do(key, fn, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def singleflight_stats() -> dict:
+    return {name: {**g.counters, "in_flight": g.in_flight()} for name, g in list(_groups.items())}
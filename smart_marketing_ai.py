@@ -1,10 +1,9 @@
-import os, uuid, requests, tempfile
+import os, requests
 from pathlib import Path
 from fastapi import FastAPI, Form, Request
 from fastapi.responses import JSONResponse, FileResponse, HTMLResponse
 from pydantic import BaseModel
 from duckduckgo_search import DDGS
-from transformers import pipeline
 from serpapi import GoogleSearch
 from PIL import Image, ImageDraw, ImageFont
 from pytrends.request import TrendReq
@@ -12,6 +11,14 @@ import typer
 import tkinter as tk
 from tkinter import simpledialog, messagebox
 from fastapi import APIRouter
+from model_registry import register_pipeline
+from inference import generate_text
+from semantic_cache import semantic_cached
+from jobs import submit_job, job_response, report_progress
+from artifact_store import artifacts
+from metrics import EXTERNAL_CALL_SECONDS
+from tracing import traced
+from singleflight import singleflight
 
 router = APIRouter()
 
@@ -22,23 +29,17 @@ def test_marketing():
 # === Setup ===
 app = FastAPI(title="🚀 Smart Digital Marketing AI (Real-Time + Extension + Overwrite)")
 cli = typer.Typer()
-TEMP_DIR = Path(tempfile.gettempdir())
 
-# === Load LLM (with fallback)
-try:
-    generator = pipeline("text2text-generation", model="google/flan-t5-large")
-except:
-    from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-    tokenizer = AutoTokenizer.from_pretrained("google/flan-t5-base")
-    model = AutoModelForSeq2SeqLM.from_pretrained("google/flan-t5-base")
-    def generator(prompt, max_length=128):
-        tokens = tokenizer(prompt, return_tensors="pt")
-        output = model.generate(**tokens, max_length=max_length)
-        return [{"generated_text": tokenizer.decode(output[0], skip_special_tokens=True)}]
+# === Declare LLM (with fallback) — loaded on first use
+register_pipeline("seo.generator-base", "text2text-generation", "google/flan-t5-base")
+register_pipeline("seo.generator", "text2text-generation", "google/flan-t5-large", fallback="seo.generator-base")
 
 SERP_API_KEY = os.getenv("SERP_API_KEY")
 
 # === AI Features ===
+@traced()
+@singleflight()
+@EXTERNAL_CALL_SECONDS.timed(service="serpapi_autocomplete")
 def get_keywords(keyword: str):
     if not SERP_API_KEY:
         return ["Error: SERP_API_KEY not set"]
@@ -47,42 +48,57 @@ def get_keywords(keyword: str):
     result = search.get_dict()
     return result.get("suggestions", [])
 
+@traced()
+@EXTERNAL_CALL_SECONDS.timed(service="duckduckgo")
 def competitor_overview(domain: str):
     with DDGS() as ddgs:
         results = ddgs.text(domain, max_results=1)
         return results[0] if results else {}
 
+@traced()
 def generate_blog(keyword: str):
     prompt = f"Write a detailed, SEO-friendly blog about: {keyword}"
-    return generator(prompt, max_length=1024)[0]["generated_text"]
+    return generate_text("seo.generator", prompt, max_length=1024)
 
+@traced()
+@semantic_cached("seo-title")
 def generate_seo_title(desc: str):
     prompt = f"Create an SEO-friendly title for product: {desc}"
-    return generator(prompt, max_length=60)[0]["generated_text"]
+    return generate_text("seo.generator", prompt, max_length=60)
 
+@traced()
 def generate_meta_description(desc: str):
     prompt = f"Write a 150 character SEO meta description for: {desc}"
-    return generator(prompt, max_length=80)[0]["generated_text"]
+    return generate_text("seo.generator", prompt, max_length=80)
 
+@traced()
 def generate_product_features(desc: str):
     prompt = f"List 5 bullet point features for: {desc}"
-    text = generator(prompt, max_length=120)[0]["generated_text"]
+    text = generate_text("seo.generator", prompt, max_length=120)
     return text.strip().split("\n")
 
+@traced()
 def generate_hashtags(keyword: str):
     prompt = f"Generate 10 trending hashtags for: {keyword}"
-    text = generator(prompt, max_length=80)[0]["generated_text"]
+    text = generate_text("seo.generator", prompt, max_length=80)
     return text.strip().split("#")[1:]
 
+@traced()
 def generate_voice_script(desc: str):
     prompt = f"Write a 2-line funny Hinglish voiceover for product: {desc}"
-    return generator(prompt, max_length=80)[0]["generated_text"]
+    return generate_text("seo.generator", prompt, max_length=80)
 
+@traced()
+@singleflight()
+@EXTERNAL_CALL_SECONDS.timed(service="google_trends")
 def get_google_trends(keyword: str):
     pytrends = TrendReq(hl='en-US', tz=330)
     pytrends.build_payload([keyword], cat=0, timeframe='now 1-H', geo='', gprop='')
     return pytrends.interest_over_time().to_dict()
 
+@traced()
+@singleflight()
+@EXTERNAL_CALL_SECONDS.timed(service="serpapi_search")
 def get_serp_rank(keyword, domain):
     params = {"engine": "google", "q": keyword, "api_key": SERP_API_KEY, "num": 10}
     search = GoogleSearch(params)
@@ -92,15 +108,14 @@ def get_serp_rank(keyword, domain):
             return i + 1
     return "Not in top 10"
 
+@traced()
 def generate_poster(title: str, tagline: str, filename: str = "") -> Path:
     img = Image.new("RGB", (800, 400), color=(245, 245, 245))
     draw = ImageDraw.Draw(img)
     font = ImageFont.load_default()
     draw.text((50, 100), title, font=font, fill=(0, 0, 0))
     draw.text((50, 200), tagline, font=font, fill=(80, 80, 80))
-    file_path = TEMP_DIR / f"{filename.strip().replace(' ', '_')}.png" if filename else TEMP_DIR / f"poster_{uuid.uuid4().hex}.png"
-    img.save(file_path)
-    return file_path
+    return artifacts.save(".png", img.save, name=filename.strip().replace(' ', '_'), prefix="poster_")
 
 # === Web UI ===
 @app.get("/", response_class=HTMLResponse)
@@ -193,16 +208,27 @@ def home():
 
 @app.post("/seo")
 def seo_analysis(keyword: str = Form(...), competitors: str = Form(""), filename: str = Form("")):
+    report_progress(0.0, "keywords")
     suggestions = get_keywords(keyword)
+    report_progress(0.05, "blog")
     blog = generate_blog(keyword)
+    report_progress(0.45, "poster")
     poster = generate_poster(keyword.title(), f"Best offer on {keyword}!", filename)
+    report_progress(0.5, "seo title")
     title = generate_seo_title(keyword)
+    report_progress(0.55, "meta description")
     desc = generate_meta_description(keyword)
+    report_progress(0.6, "hashtags")
     tags = generate_hashtags(keyword)
+    report_progress(0.65, "features")
     bullets = generate_product_features(keyword)
+    report_progress(0.7, "voice script")
     voice = generate_voice_script(keyword)
+    report_progress(0.75, "trends")
     trends = get_google_trends(keyword)
+    report_progress(0.85, "serp rank")
     rank = get_serp_rank(keyword, competitors.split(",")[0] if competitors else "")
+    report_progress(0.9, "competitors")
     competitors_data = [competitor_overview(c.strip()) for c in competitors.split(",") if c.strip()]
 
     return {
@@ -220,10 +246,14 @@ def seo_analysis(keyword: str = Form(...), competitors: str = Form(""), filename
         "competitors": competitors_data
     }
 
+@app.post("/seo/job")
+def seo_analysis_job(keyword: str = Form(...), competitors: str = Form(""), filename: str = Form("")):
+    return job_response(submit_job("seo", seo_analysis, keyword, competitors, filename))
+
 @app.get("/poster/{name}")
 def get_poster(name: str):
-    path = TEMP_DIR / name
-    return FileResponse(path, media_type="image/png") if path.exists() else JSONResponse({"error": "Not Found"}, 404)
+    path = artifacts.get(name)
+    return FileResponse(path, media_type="image/png") if path else JSONResponse({"error": "Not Found"}, 404)
 
 # === CLI ===
 @cli.command()
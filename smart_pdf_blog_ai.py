@@ -1,18 +1,21 @@
 # ✅ smart_pdf_blog_ai_updated.py
 import os
 import uuid
-import tempfile
 from pathlib import Path
 from fpdf import FPDF
-from fastapi import FastAPI, UploadFile, File, Form
-from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
+from fastapi import FastAPI, UploadFile, File, Form, Request
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from transformers import pipeline
 import markdown
 from bs4 import BeautifulSoup
 import tkinter as tk
 from tkinter import filedialog, simpledialog, messagebox
 from fastapi import APIRouter
+from model_registry import register_pipeline
+from inference import run_inference, generate_text, stream_text, sse_event, register_assistant
+from jobs import submit_job, job_response, report_progress
+from artifact_store import artifacts
+from tracing import traced
 
 router = APIRouter()
 
@@ -22,19 +25,29 @@ def test_pdf_blog():
 
 # === Setup ===
 app = FastAPI(title="📘 Smart PDF & Blog Generator")
-TEMP_DIR = Path(tempfile.gettempdir())
 
-# === Load AI Models ===
-blog_writer = pipeline("text2text-generation", model="databricks/dolly-v2-3b")
-summarizer = pipeline("summarization", model="google/flan-t5-large")
+# === Declare AI Models (loaded on first use) ===
+register_pipeline("blog.writer", "text-generation", "databricks/dolly-v2-3b")
+register_pipeline("blog.summarizer", "summarization", "google/flan-t5-large")
+
+# ✅ Draft model for assisted decoding (ASSISTED_DECODING=1): dolly-v2 is Pythia-based, so a small
+# Pythia shares its GPT-NeoX tokenizer and can propose tokens for dolly to verify
+BLOG_DRAFT_MODEL = os.getenv("BLOG_DRAFT_MODEL", "EleutherAI/pythia-160m")
+register_pipeline("blog.draft", "text-generation", BLOG_DRAFT_MODEL)
+register_assistant("blog.writer", "blog.draft")
 
 # === Content Generator ===
+def blog_prompt(topic: str, tone: str = "informative") -> str:
+    return f"Write a well-structured, {tone} blog post on: {topic}"
+
+@traced()
 def generate_blog(topic: str, tone: str = "informative") -> str:
-    prompt = f"Write a well-structured, {tone} blog post on: {topic}"
-    return blog_writer(prompt, max_length=1024)[0]["generated_text"]
+    prompt = blog_prompt(topic, tone)
+    return generate_text("blog.writer", prompt, max_length=1024, return_full_text=False)
 
 # === Markdown/HTML to PDF ===
-def markdown_to_pdf(md_text: str, pdf_path: Path):
+@traced()
+def markdown_to_pdf(md_text: str, pdf_path: Path = None, name: str = "") -> Path:
     html = markdown.markdown(md_text)
     soup = BeautifulSoup(html, "html.parser")
     pdf = FPDF()
@@ -54,7 +67,17 @@ def markdown_to_pdf(md_text: str, pdf_path: Path):
             pdf.set_font("Arial", size=12)
         pdf.multi_cell(0, 10, element.text)
 
+    if pdf_path is None:
+        return artifacts.save(".pdf", lambda p: pdf.output(str(p)), name=name, prefix="blog_")
     pdf.output(str(pdf_path))
+    return pdf_path
+
+@traced()
+def save_blog(full_text: str, file_name_base: str, generate_pdf: bool = False) -> Path:
+    md_path = artifacts.save(".md", lambda p: p.write_text(full_text, encoding="utf-8"), name=file_name_base)
+    if generate_pdf:
+        return markdown_to_pdf(full_text, name=file_name_base)
+    return md_path
 
 # === API Models ===
 class BlogRequest(BaseModel):
@@ -178,29 +201,77 @@ async def generate_blog_handler(
     overwrite: bool = Form(False),
     file_name: str = Form("")
 ):
-    full_text = generate_blog(topic, tone)
-    if summarize:
-        full_text = summarizer(full_text, max_length=512, min_length=100)[0]["summary_text"]
+    try:
+        output = await run_inference(build_blog, topic, tone, summarize, generate_pdf, overwrite, file_name)
+    except FileExistsError:
+        return JSONResponse(status_code=400, content={"error": "❌ File exists. Use overwrite option."})
+    media_type = "application/pdf" if output.suffix == ".pdf" else "text/markdown"
+    return FileResponse(output, media_type=media_type, filename=output.name)
 
+def build_blog(topic: str, tone: str = "informative", summarize: bool = False, generate_pdf: bool = False,
+               overwrite: bool = False, file_name: str = "") -> Path:
     if not file_name:
         file_name_base = f"blog_{uuid.uuid4()}"
     else:
         file_name_base = file_name.strip().replace(" ", "_")
 
-    output_txt = TEMP_DIR / f"{file_name_base}.md"
-    output_pdf = TEMP_DIR / f"{file_name_base}.pdf"
+    if artifacts.exists(f"{file_name_base}.md") and not overwrite:
+        raise FileExistsError(f"{file_name_base}.md")
 
-    if output_txt.exists() and not overwrite:
-        return JSONResponse(status_code=400, content={"error": "❌ File exists. Use overwrite option."})
+    report_progress(0.05, "generating blog")
+    full_text = generate_blog(topic, tone)
+    if summarize:
+        report_progress(0.7, "summarizing")
+        full_text = generate_text("blog.summarizer", full_text, max_length=512, min_length=100)
 
-    with open(output_txt, "w", encoding="utf-8") as f:
-        f.write(full_text)
+    report_progress(0.85, "writing files")
+    return save_blog(full_text, file_name_base, generate_pdf)
 
-    if generate_pdf:
-        markdown_to_pdf(full_text, output_pdf)
-        return FileResponse(output_pdf, media_type="application/pdf", filename=output_pdf.name)
+@app.post("/generate/job")
+def generate_blog_job(
+    topic: str = Form(...),
+    tone: str = Form("informative"),
+    summarize: bool = Form(False),
+    generate_pdf: bool = Form(False),
+    overwrite: bool = Form(False),
+    file_name: str = Form("")
+):
+    return job_response(submit_job("blog", build_blog, topic, tone, summarize, generate_pdf, overwrite, file_name))
 
-    return FileResponse(output_txt, media_type="text/markdown", filename=output_txt.name)
+# === Streaming (Server-Sent Events) ===
+@app.post("/generate/stream")
+async def generate_blog_stream(
+    request: Request,
+    topic: str = Form(...),
+    tone: str = Form("informative"),
+    generate_pdf: bool = Form(False),
+    overwrite: bool = Form(False),
+    file_name: str = Form("")
+):
+    file_name_base = file_name.strip().replace(" ", "_") if file_name else f"blog_{uuid.uuid4()}"
+
+    def events():
+        # Same guard as build_blog(), reported as an SSE error event instead of a 400.
+        if artifacts.exists(f"{file_name_base}.md") and not overwrite:
+            yield sse_event("error", {"error": "❌ File exists. Use overwrite option."})
+            return
+        parts = []
+        for chunk in stream_text("blog.writer", blog_prompt(topic, tone), max_length=1024):
+            parts.append(chunk)
+            yield sse_event("token", chunk)
+        output = save_blog("".join(parts), file_name_base, generate_pdf)
+        # url_for includes the mount's root_path (/blog), unlike a path relative to the stream URL.
+        download = str(request.url_for("download_blog", name=output.name))
+        yield sse_event("done", {"file": output.name, "download": download})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/download/{name}")
+def download_blog(name: str):
+    path = artifacts.get(name)
+    if path is None or path.suffix not in (".md", ".pdf"):
+        return JSONResponse({"error": "Not Found"}, 404)
+    return FileResponse(path, filename=path.name)
 
 # === CLI Mode ===
 def cli_mode():
@@ -217,19 +288,13 @@ def cli_mode():
     else:
         file_base = file_name
 
-    path = TEMP_DIR / f"{file_base}.md"
-    pdf_path = TEMP_DIR / f"{file_base}.pdf"
-
-    if path.exists() and not overwrite:
+    if artifacts.exists(f"{file_base}.md") and not overwrite:
         print("❌ File exists. Use overwrite option.")
         return
 
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(result)
-
+    path = save_blog(result, file_base, pdf)
     if pdf:
-        markdown_to_pdf(result, pdf_path)
-        print(f"✅ PDF Created: {pdf_path}")
+        print(f"✅ PDF Created: {path}")
     else:
         print(f"✅ Blog saved: {path}")
 
@@ -247,19 +312,13 @@ def start_gui():
 
         result = generate_blog(topic, tone)
         file_base = file_name.strip().replace(" ", "_") if file_name else f"gui_blog_{uuid.uuid4()}"
-        file_path = TEMP_DIR / f"{file_base}.md"
-        pdf_path = TEMP_DIR / f"{file_base}.pdf"
-
-        if file_path.exists() and not overwrite:
+        if artifacts.exists(f"{file_base}.md") and not overwrite:
             messagebox.showerror("Error", "❌ File already exists. Use overwrite option.")
             return
 
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(result)
-
+        file_path = save_blog(result, file_base, pdf)
         if pdf:
-            markdown_to_pdf(result, pdf_path)
-            messagebox.showinfo("Done", f"✅ PDF: {pdf_path}")
+            messagebox.showinfo("Done", f"✅ PDF: {file_path}")
         else:
             messagebox.showinfo("Done", f"✅ Blog saved: {file_path}")
 
@@ -0,0 +1,11 @@
+from artifact_store import ArtifactStore
+from tracing import start_trace
+
+
+def test_save_inside_trace(tmp_path):
+    store = ArtifactStore(root=tmp_path)
+    with start_trace("POST /test") as trace:
+        path = store.save(".txt", lambda p: p.write_text("hello"), name="report")
+    assert path.read_text() == "hello"
+    assert store.exists("report.txt")
+    assert [(s["name"], s["attrs"]) for s in trace.spans] == [("artifact.save", {"artifact": "report.txt"})]
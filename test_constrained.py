@@ -0,0 +1,73 @@
+import pytest
+from constrained import COMPLETE, PARTIAL, INVALID, formula_status, is_valid_formula
+
+
+@pytest.mark.parametrize("text", [
+    "=SUM(A2:B2)",
+    "=A2*B2",
+    "=$A$1+1",
+    "=SUM(B:B)",
+    "=SUM($B:$B)",
+    "=SUM(1:1)",
+    "=SUM($2:$10)",
+    "=Sheet1!A1",
+    "=SUM(Sheet1!B:B)",
+    "=SUM(Sales_2024!A2:A100)",
+    "='My Sheet'!A1*2",
+    "='Bob''s data'!C3",
+    "=IF(A2>10,\"High\",\"Low\")",
+    "=ROUND(AVERAGE(C2:C10), 2)",
+    "=TRUE",
+    "=-A1%",
+    "=1.5E3",
+    "=COUNTIF(A:A,\">0\")",
+])
+def test_complete(text):
+    assert formula_status(text) == COMPLETE
+    assert is_valid_formula(text)
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "=",
+    "=SU",
+    "=SUM(",
+    "=SUM(A2:",
+    "=SUM(A2:B",
+    "=SUM(B:",
+    "=SUM(1:",
+    "=Sheet",
+    "=Sheet1!",
+    "=Sheet1!B",
+    "='My Sh",
+    "='My Sheet'",
+    "=\"abc",
+    "=A1+",
+])
+def test_partial(text):
+    assert formula_status(text) == PARTIAL
+    assert not is_valid_formula(text)
+
+
+@pytest.mark.parametrize("text", [
+    "SUM(A1)",
+    "=SUM(A1))",
+    "=FOO(A1)",
+    "=B+1",
+    "=SUM(B:B2)",
+    "=SUM(A1:B)",
+    "=SUM(1:B)",
+    "=Sheet1!SUM(A1)",
+    "=Sheet1!TRUE",
+    "=A1  +1",
+    "=A1 is the total",
+    "=1..2",
+    "=#REF",
+])
+def test_invalid(text):
+    assert formula_status(text) == INVALID
+    assert not is_valid_formula(text)
+
+
+def test_is_valid_formula_strips_whitespace():
+    assert is_valid_formula("  =SUM(B:B)\n")
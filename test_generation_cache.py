@@ -0,0 +1,11 @@
+from generation_cache import GenerationCache
+
+
+def test_disk_bytes_match_files_on_disk(tmp_path):
+    cache = GenerationCache(directory=tmp_path, disk_mb=1)
+    cache.put("a" * 64, "first answer")
+    cache.put("b" * 64, "second answer")
+    cache.put("a" * 64, "first answer, rewritten")
+    on_disk = sum(p.stat().st_size for p in tmp_path.glob("*/*.json"))
+    assert cache.disk_usage() == on_disk
+    assert cache.counters["disk_evictions"] == 0
@@ -0,0 +1,169 @@
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+import model_registry
+from metrics import Counter, GaugeFunc
+
+# 🪜 Load-aware model tiering
+# text2text / summarization models on a known ladder (flan-t5 large → base → small) are served
+# by a smaller variant while the inference queue is slow, and move back up when it recovers.
+# The load signal is the p90 of inference queue waits over the last TIER_WINDOW_S seconds; the
+# tier level moves one step at a time, down above TIER_DOWNSHIFT_MS and up below TIER_UPSHIFT_MS,
+# at most once per TIER_COOLDOWN_S, so it doesn't flap. A smaller tier is only used once it
+# is loaded (it starts loading in the background the first time it's wanted), so
+# downshifting never stalls a request on a model load.
+# The tier that served each generation is reported in the X-Model-Tier response header, in
+# model_tier_served_total and in GET /models/tiers.
+#
+# TIER_LADDERS: ladders as "big>medium>small" model ids, comma-separated.
+
+TIERING_ENABLED = os.getenv("TIERING_ENABLED", "1") == "1"
+TIER_TASKS = {"text2text-generation", "summarization"}
+TIER_LADDERS = [[m.strip() for m in ladder.split(">") if m.strip()] for ladder in
+                os.getenv("TIER_LADDERS", "google/flan-t5-large>google/flan-t5-base>google/flan-t5-small").split(",")]
+TIER_DOWNSHIFT_MS = float(os.getenv("TIER_DOWNSHIFT_MS", "2000"))
+TIER_UPSHIFT_MS = float(os.getenv("TIER_UPSHIFT_MS", "500"))
+TIER_WINDOW_S = float(os.getenv("TIER_WINDOW_S", "15"))
+TIER_COOLDOWN_S = float(os.getenv("TIER_COOLDOWN_S", "10"))
+
+TIER_SERVED = Counter("model_tier_served_total", "Generations by requested model and the tier that served them")
+
+
+class LoadPolicy:
+    def __init__(self, max_level: int):
+        self.max_level = max_level
+        self.level = 0
+        self.changed_at = 0.0
+        self.shifts = 0
+        self._waits = deque()
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._waits.append((time.monotonic(), seconds))
+
+    def queue_latency_ms(self) -> float:
+        cutoff = time.monotonic() - TIER_WINDOW_S
+        while self._waits and self._waits[0][0] < cutoff:
+            self._waits.popleft()
+        waits = sorted(w for _, w in self._waits)
+        return waits[int(len(waits) * 0.9)] * 1000 if waits else 0.0
+
+    def current(self) -> int:
+        with self._lock:
+            now = time.monotonic()
+            if now - self.changed_at < TIER_COOLDOWN_S:
+                return self.level
+            latency = self.queue_latency_ms()
+            step = 1 if latency > TIER_DOWNSHIFT_MS else -1 if latency < TIER_UPSHIFT_MS else 0
+            level = min(self.max_level, max(0, self.level + step))
+            if level != self.level:
+                print(f"🪜 Model tier level {self.level} → {level} (queue p90 {latency:.0f} ms)")
+                self.level, self.changed_at = level, now
+                self.shifts += 1
+            return self.level
+
+
+policy = LoadPolicy(max_level=max(len(ladder) for ladder in TIER_LADDERS) - 1)
+_tiers = {}
+_warming = set()
+_served = contextvars.ContextVar("tiers_served", default=None)
+
+
+def tiers(name: str) -> list:
+    # [name, smaller variants...] for a registry name; just [name] when it has no ladder.
+    if name not in _tiers:
+        spec = model_registry.model_spec(name)
+        chain = [name]
+        if spec.task in TIER_TASKS:
+            for ladder in TIER_LADDERS:
+                if spec.model_id in ladder:
+                    chain += [model_registry.tier_variant(name, m) for m in ladder[ladder.index(spec.model_id) + 1:]]
+                    break
+        _tiers[name] = chain
+    return _tiers[name]
+
+
+def _warm(variant: str):
+    if variant in _warming:
+        return
+    _warming.add(variant)
+
+    def load():
+        try:
+            model_registry.try_get_model(variant)
+        finally:
+            _warming.discard(variant)
+    threading.Thread(target=load, name=f"tier-warm-{variant}", daemon=True).start()
+
+
+def select(name: str) -> str:
+    # The registry name to serve `name` with right now.
+    if not TIERING_ENABLED:
+        return name
+    chain = tiers(name)
+    if len(chain) == 1:
+        return name
+    level = policy.current()
+    for variant in reversed(chain[1:min(level, len(chain) - 1) + 1]):
+        if model_registry.is_loaded(variant):
+            return variant
+        _warm(variant)
+    return name
+
+
+def tier_label(name: str) -> str:
+    return model_registry.model_spec(name).model_id.rsplit("-", 1)[-1] or name
+
+
+def report(name: str, served: str):
+    if len(tiers(name)) == 1:
+        return
+    label = tier_label(served)
+    TIER_SERVED.inc(model=name, tier=label)
+    tiers_served = _served.get()
+    if tiers_served is not None:
+        tiers_served[name] = label
+
+
+class TierHeaderMiddleware:
+    # Adds X-Model-Tier ("seo.generator=base, ...") to responses whose generations were tiered.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        tiers_served = {}
+        token = _served.set(tiers_served)
+
+        async def send_with_tier(message):
+            if message["type"] == "http.response.start" and tiers_served:
+                value = ", ".join(f"{k}={v}" for k, v in sorted(tiers_served.items()))
+                message = {**message, "headers": [*message.get("headers", []), (b"x-model-tier", value.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_tier)
+        finally:
+            _served.reset(token)
+
+
+def tier_stats() -> dict:
+    with policy._lock:
+        latency = policy.queue_latency_ms()
+    return {
+        "enabled": TIERING_ENABLED,
+        "level": policy.level,
+        "queue_p90_ms": round(latency, 1),
+        "downshift_ms": TIER_DOWNSHIFT_MS,
+        "upshift_ms": TIER_UPSHIFT_MS,
+        "shifts": policy.shifts,
+        "ladders": {name: chain for name, chain in _tiers.items() if len(chain) > 1},
+        "warming": sorted(_warming),
+    }
+
+
+GaugeFunc("model_tier_level", "Current load-aware tier level (0 = full-size models)", lambda: policy.level)
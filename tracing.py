@@ -0,0 +1,154 @@
+import contextvars
+import functools
+import itertools
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+# 🔍 Lightweight span tracing
+# Each request carries a trace of named stages (spans) and their durations. Spans opened in
+# worker threads attach to the request's trace because contextvars are copied into the
+# threadpool and the inference executor. Traces slower than TRACE_SLOW_MS are kept in a
+# ring buffer and can be exported in the Chrome trace-event format (chrome://tracing, Perfetto).
+
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "2000"))
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+
+_trace = contextvars.ContextVar("trace", default=None)
+_span = contextvars.ContextVar("span", default=None)
+_ids = itertools.count(1)
+_slow = deque(maxlen=TRACE_BUFFER_SIZE)
+_slow_lock = threading.Lock()
+
+
+class Trace:
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.started = time.time()
+        self.t0 = time.perf_counter()
+        self.duration_ms = None
+        self.attrs = {}
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span_id: int, name: str, start: float, end: float, parent, attrs: dict):
+        with self._lock:
+            self.spans.append({
+                "id": span_id,
+                "parent": parent,
+                "name": name,
+                "start_ms": round((start - self.t0) * 1000, 3),
+                "duration_ms": round((end - start) * 1000, 3),
+                "thread": threading.current_thread().name,
+                "attrs": attrs,
+            })
+
+    def summary(self) -> dict:
+        return {"trace_id": self.id, "name": self.name, "started": self.started,
+                "duration_ms": self.duration_ms, "span_count": len(self.spans), **self.attrs}
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start_ms"])
+        return {**self.summary(), "spans": spans}
+
+    def to_chrome(self) -> dict:
+        threads = {}
+        events = [{"name": self.name, "ph": "X", "ts": 0, "dur": (self.duration_ms or 0) * 1000,
+                   "pid": 1, "tid": 0, "args": self.attrs}]
+        for s in self.to_dict()["spans"]:
+            tid = threads.setdefault(s["thread"], len(threads) + 1)
+            events.append({"name": s["name"], "ph": "X", "ts": s["start_ms"] * 1000, "dur": s["duration_ms"] * 1000,
+                           "pid": 1, "tid": tid, "args": s["attrs"]})
+        events += [{"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": name}}
+                   for name, tid in threads.items()]
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"trace_id": self.id}}
+
+
+def current_trace():
+    return _trace.get()
+
+
+@contextmanager
+def start_trace(name: str):
+    trace = Trace(name)
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+        trace.duration_ms = round((time.perf_counter() - trace.t0) * 1000, 3)
+        if trace.duration_ms >= TRACE_SLOW_MS:
+            with _slow_lock:
+                _slow.append(trace)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    # Yields the span's attrs dict so callers can annotate it (cache hit, tier, ...).
+    trace = _trace.get()
+    if trace is None:
+        yield attrs
+        return
+    span_id = next(_ids)
+    parent = _span.get()
+    token = _span.set(span_id)
+    start = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        _span.reset(token)
+        trace.add(span_id, name, start, time.perf_counter(), parent, attrs)
+
+
+def record_span(name: str, start: float, end: float, **attrs):
+    trace = _trace.get()
+    if trace is not None:
+        trace.add(next(_ids), name, start, end, _span.get(), attrs)
+
+
+def traced(name: str = ""):
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def slow_traces(min_ms: float = 0, name: str = "", limit: int = 50) -> list:
+    with _slow_lock:
+        traces = list(_slow)
+    matched = [t for t in reversed(traces) if t.duration_ms >= min_ms and name in t.name]
+    return [t.summary() for t in matched[:limit]]
+
+
+def find_trace(trace_id: str):
+    with _slow_lock:
+        return next((t for t in _slow if t.id == trace_id), None)
+
+
+class TracingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        with start_trace(f"{scope.get('method', '')} {scope.get('path', '')}") as trace:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    trace.attrs["status"] = message["status"]
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"x-trace-id", trace.id.encode())]
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
@@ -1,6 +1,4 @@
 import os
-import uuid
-import tempfile
 import subprocess
 from pathlib import Path
 from fastapi import FastAPI, Form
@@ -10,8 +8,13 @@ from gtts import gTTS
 import typer
 import tkinter as tk
 from tkinter import simpledialog, messagebox
-from transformers import pipeline
 from fastapi import APIRouter
+from model_registry import register_model, try_get_model
+from inference import run_sync
+from scheduler import classify
+from jobs import submit_job, job_response, report_progress
+from artifact_store import artifacts
+from tracing import traced
 
 router = APIRouter()
 
@@ -21,7 +24,6 @@ def test_tts():
 
 app = FastAPI(title="🎙️ Smart TTS AI")
 cli = typer.Typer()
-TEMP_DIR = Path(tempfile.gettempdir())
 
 # ✅ Supported languages
 SUPPORTED_LANGUAGES = {
@@ -39,30 +41,29 @@ SUPPORTED_LANGUAGES = {
     "portuguese": "pt"
 }
 
-# ✅ Bark-style (Optional)
-try:
-    bark_tts = pipeline("text-to-speech", model="suno/bark-small")
-except:
-    bark_tts = None
+# ✅ Bark-style (Optional) — loaded on first use
+def _load_bark():
+    from transformers import pipeline
+    return pipeline("text-to-speech", model="suno/bark-small")
+
+
+register_model("tts.bark", _load_bark)
 
 # ✅ Generate TTS with overwrite support
+@traced()
 def generate_audio_file(text: str, language: str = "english", engine: str = "gtts", file_name: str = "") -> Path:
     lang_code = SUPPORTED_LANGUAGES.get(language.lower(), "en")
-    file_name_base = file_name.strip().replace(" ", "_") if file_name else f"voice_{uuid.uuid4()}"
-    file_path = TEMP_DIR / f"{file_name_base}.mp3"
+    file_name_base = file_name.strip().replace(" ", "_") if file_name else ""
 
-    if file_path.exists() and not file_name:
-        file_path = TEMP_DIR / f"{file_name_base}_{uuid.uuid4().hex[:4]}.mp3"
+    report_progress(0.1, f"synthesizing ({engine})")
+    bark_tts = try_get_model("tts.bark") if engine == "bark" else None
+    if bark_tts:
+        with classify("tts", len(text)):
+            audio = run_sync(bark_tts, text)[0]["audio"]
+        return artifacts.save(".mp3", lambda p: p.write_bytes(audio), name=file_name_base, prefix="voice_")
 
-    if engine == "bark" and bark_tts:
-        audio = bark_tts(text)[0]["audio"]
-        with open(file_path, "wb") as f:
-            f.write(audio)
-    else:
-        tts = gTTS(text=text, lang=lang_code)
-        tts.save(file_path)
-
-    return file_path
+    tts = gTTS(text=text, lang=lang_code)
+    return artifacts.save(".mp3", tts.save, name=file_name_base, prefix="voice_")
 
 def play_audio(file_path: Path):
     try:
@@ -188,6 +189,10 @@ def generate_tts(text: str = Form(...), language: str = Form("english"), engine:
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
+@app.post("/tts/generate/job")
+def generate_tts_job(text: str = Form(...), language: str = Form("english"), engine: str = Form("gtts"), file_name: str = Form("")):
+    return job_response(submit_job("tts", generate_audio_file, text, language, engine, file_name))
+
 # ✅ CLI Mode
 @cli.command()
 def speak(
@@ -1,11 +1,10 @@
-import os, uuid, tempfile, subprocess
+import os, subprocess
 from pathlib import Path
 from fastapi import FastAPI, UploadFile, File, Form
 from fastapi.responses import FileResponse, JSONResponse, HTMLResponse
 from pydantic import BaseModel
 import markdown2
 from bs4 import BeautifulSoup
-from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
 from docx import Document
 from docx.shared import Inches
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
@@ -14,6 +13,11 @@ import win32com.client
 import tkinter as tk
 from tkinter import filedialog, simpledialog, messagebox
 from fastapi import APIRouter
+from model_registry import register_pipeline, lazy_model
+from inference import run_sync, generate_text
+from scheduler import classify
+from artifact_store import artifacts
+from tracing import span, traced
 
 router = APIRouter()
 
@@ -22,14 +26,12 @@ def sample_word_route():
     return {"message": "Word route is working!"}
 
 app = FastAPI(title="📄 Smart Word AI Pro")
-TEMP_DIR = Path(tempfile.gettempdir())
 
-# ✅ Load models locally
-print("🔄 Loading AI models locally...")
-summarizer = pipeline("summarization", model="google/flan-t5-small", local_files_only=True)
-grammar_corrector = pipeline("text2text-generation", model="vennify/t5-base-grammar-correction", local_files_only=True)
-classifier = pipeline("text-classification", model="bhadresh-savani/bert-base-uncased-emotion", local_files_only=True)
-print("✅ Models loaded.")
+# ✅ Declare local models — loaded on first use
+register_pipeline("word.summarizer", "summarization", "google/flan-t5-small", local_files_only=True)
+register_pipeline("word.grammar", "text2text-generation", "vennify/t5-base-grammar-correction", local_files_only=True)
+register_pipeline("word.classifier", "text-classification", "bhadresh-savani/bert-base-uncased-emotion", local_files_only=True)
+classifier = lazy_model("word.classifier")
 
 def translate_to_english(text: str) -> str:
     try:
@@ -48,15 +50,16 @@ def ensure_word_running():
         print("❌ MS Word launch failed:", e)
         return False
 
+@traced()
 def process_text(text: str, summarize=False, grammar_check=False) -> str:
     if summarize and len(text.split()) > 100:
         try:
-            text = summarizer(text, max_length=1024, min_length=100, do_sample=False)[0]['summary_text']
+            text = generate_text("word.summarizer", text, max_length=1024, min_length=100, do_sample=False)
         except Exception as e:
             print("Summarizer failed:", e)
     if grammar_check:
         try:
-            text = grammar_corrector(text, max_length=1024)[0]['generated_text']
+            text = generate_text("word.grammar", text, max_length=1024)
         except Exception as e:
             print("Grammar corrector failed:", e)
     return text
@@ -86,8 +89,10 @@ def ai_format(doc: Document, content: str):
         else:
             doc.add_paragraph(line.strip())
 
+@traced()
 def detect_type(content: str) -> str:
-    result = classifier(content[:512])
+    with classify("word", 32):
+        result = run_sync(classifier, content[:512])
     return result[0]['label']
 
 def insert_image(doc: Document):
@@ -102,8 +107,9 @@ def generate_doc(title: str, content: str, fmt: str = "text") -> Path:
     doc_type = detect_type(content)
     doc.add_paragraph(f"🧠 Detected as: {doc_type.upper()}")
     if fmt == "markdown":
-        html = markdown2.markdown(content)
-        soup = BeautifulSoup(html, "html.parser")
+        with span("markdown parse"):
+            html = markdown2.markdown(content)
+            soup = BeautifulSoup(html, "html.parser")
         for tag in soup.find_all():
             if tag.name in ["h1", "h2"]:
                 doc.add_heading(tag.text.strip(), level=2)
@@ -116,9 +122,8 @@ def generate_doc(title: str, content: str, fmt: str = "text") -> Path:
         insert_table(doc, content)
         insert_image(doc)
 
-    file_path = TEMP_DIR / f"doc_{uuid.uuid4()}.docx"
-    doc.save(file_path)
-    return file_path
+    with span("doc.save"):
+        return artifacts.save(".docx", doc.save, prefix="doc_")
 
 def get_open_word_content() -> str:
     try: